@@ -1,19 +1,17 @@
 import cv2
-import numpy as np
 import os
 
+from indexed import apply_palette, colormap_palette, index_map
+
 # Step 1: Create an indexed color image (palette-based 8-bit)
-# We'll generate an image with a gradient using 256 colors
+# We'll generate an image with a gradient using 256 colors: (x + y) % 256
 height, width = 256, 256
-indexed_img = np.zeros((height, width), dtype=np.uint8)
-
-for y in range(height):
-    for x in range(width):
-        indexed_img[y, x] = (x + y) % 256  # Cycle through 0–255
+indexed_img = index_map(height, width)
 
-# Step 2: Create a color palette (OpenCV doesn't store palettes directly, so we map them)
-palette = np.array([[i, 255 - i, (i * 2) % 256] for i in range(256)], dtype=np.uint8)
-indexed_color_img = cv2.applyColorMap(indexed_img, cv2.COLORMAP_JET)  # Simulated palette effect
+# Step 2: Create a color palette and map every index to its color
+# (OpenCV doesn't store palettes directly, so the colors are looked up per pixel)
+palette = colormap_palette(cv2.COLORMAP_JET)  # indexed.ramp_palette() is a hand-made alternative
+indexed_color_img = apply_palette(indexed_img, palette)
 
 # Step 3: Save in different formats
 cv2.imwrite("indexed_output.jpg", indexed_color_img)
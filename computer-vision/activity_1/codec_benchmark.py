@@ -0,0 +1,159 @@
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from indexed import apply_palette, colormap_palette, index_map
+
+"""
+Codec benchmark for the activity_1 image types.
+
+The a1_*_to_selected_formats.py scripts write each image as JPEG, PNG and
+BMP to disk and compare the file sizes by hand. This encodes every image
+type with every format at several quality / compression levels in memory
+(cv2.imencode / cv2.imdecode, no files written) and measures, for each
+combination:
+
+    bytes        encoded size
+    encode_ms    cv2.imencode time (fastest of --repeats)
+    decode_ms    cv2.imdecode time (fastest of --repeats)
+    psnr         decoded vs original in dB (inf when lossless)
+
+Combinations run in parallel in a process pool. Results are printed as a
+table and can be saved as CSV or JSON (by the --output extension).
+
+Usage:
+    python3 codec_benchmark.py
+    python3 codec_benchmark.py --input input.jpg --output codecs.csv --repeats 5
+"""
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INPUT = os.path.join(SCRIPT_DIR, 'input.jpg')
+
+# format -> (extension, imencode parameter, levels); BMP has no settings
+FORMATS = {
+    'jpeg': ('.jpg', cv2.IMWRITE_JPEG_QUALITY, (50, 75, 90, 95, 100)),
+    'png': ('.png', cv2.IMWRITE_PNG_COMPRESSION, (0, 1, 3, 6, 9)),
+    'webp': ('.webp', cv2.IMWRITE_WEBP_QUALITY, (50, 75, 90, 100, 101)),  # above 100 is lossless
+    'bmp': ('.bmp', None, (None,)),
+}
+COLUMNS = ('image', 'format', 'level', 'bytes', 'encode_ms', 'decode_ms', 'psnr')
+
+def make_images(input_path=DEFAULT_INPUT):
+    """The four image types of activity_1; grayscale and truecolor come from input_path if it exists."""
+    # Checkerboard, as in a1_binary_to_selected_formats.py
+    binary = np.zeros((256, 256), dtype=np.uint8)
+    binary[::2, ::2] = 255
+    binary[1::2, 1::2] = 255
+
+    # (x + y) % 256 through the JET palette, as in a1_indexed_to_selected_formats.py
+    indexed = apply_palette(index_map(256, 256), colormap_palette(cv2.COLORMAP_JET))
+
+    truecolor = cv2.imread(input_path) if os.path.exists(input_path) else None
+    if truecolor is None:
+        # Two color halves, as in a1_true_color_to_selected_formats.py
+        truecolor = np.zeros((200, 200, 3), dtype=np.uint8)
+        truecolor[:, :100] = [255, 0, 0]
+        truecolor[:, 100:] = [0, 255, 0]
+
+    return {
+        'binary': binary,
+        'grayscale': cv2.cvtColor(truecolor, cv2.COLOR_BGR2GRAY),
+        'indexed': indexed,
+        'truecolor': truecolor,
+    }
+
+def psnr(original, decoded):
+    if decoded.ndim != original.ndim:
+        # WebP always decodes to BGR
+        decoded = cv2.cvtColor(decoded, cv2.COLOR_BGR2GRAY)
+    if np.array_equal(original, decoded):
+        return float('inf')
+    return cv2.PSNR(original, decoded)
+
+_images = None
+
+def _init_worker(images):
+    global _images
+    _images = images
+    # Combinations already run in parallel; avoid OpenCV oversubscription
+    cv2.setNumThreads(1)
+
+def _fastest(function, repeats):
+    timings = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start_time)
+    return result, min(timings)
+
+def measure(image_name, format, level, repeats=3):
+    """Runs in a worker process. Returns one result row as a dict."""
+    image = _images[image_name]
+    extension, parameter, _ = FORMATS[format]
+    params = [] if parameter is None else [parameter, level]
+
+    (ok, encoded), encode_seconds = _fastest(lambda: cv2.imencode(extension, image, params), repeats)
+    if not ok:
+        raise ValueError(f"Could not encode {image_name} as {format} {level}")
+    decoded, decode_seconds = _fastest(lambda: cv2.imdecode(encoded, cv2.IMREAD_UNCHANGED), repeats)
+
+    return {
+        'image': image_name, 'format': format, 'level': level,
+        'bytes': encoded.size,
+        'encode_ms': encode_seconds * 1000,
+        'decode_ms': decode_seconds * 1000,
+        'psnr': psnr(image, decoded),
+    }
+
+def run_benchmark(images, formats=tuple(FORMATS), repeats=3, workers=None):
+    combinations = [(image_name, format, level)
+                    for image_name in images
+                    for format in formats
+                    for level in FORMATS[format][2]]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(images,)) as pool:
+        futures = [pool.submit(measure, *combination, repeats) for combination in combinations]
+        return [future.result() for future in futures]
+
+def save_results(rows, path):
+    if os.path.splitext(path)[1].lower() == '.json':
+        # JSON has no infinity; lossless results get a null PSNR
+        rows = [dict(row, psnr=None if row['psnr'] == float('inf') else row['psnr']) for row in rows]
+        with open(path, 'w') as file:
+            json.dump(rows, file, indent=2)
+    else:
+        with open(path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark image codecs in memory across the activity_1 image types")
+    parser.add_argument("--input", default=DEFAULT_INPUT, help="Source for the grayscale and truecolor images")
+    parser.add_argument("--formats", nargs="+", choices=list(FORMATS), default=list(FORMATS))
+    parser.add_argument("--repeats", type=int, default=3, help="Timed encodes/decodes per combination")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--output", help="Write results to this .csv or .json file")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    rows = run_benchmark(make_images(args.input), args.formats, args.repeats, args.workers)
+    execution_time = time.time() - start_time
+
+    print(f"{'image':<10}{'format':<7}{'level':>6}{'KB':>10}{'encode ms':>11}{'decode ms':>11}{'PSNR dB':>9}")
+    for row in rows:
+        level = '' if row['level'] is None else row['level']
+        print(f"{row['image']:<10}{row['format']:<7}{level:>6}{row['bytes'] / 1024:10.2f}"
+              f"{row['encode_ms']:11.3f}{row['decode_ms']:11.3f}{row['psnr']:9.2f}")
+    print(f"{len(rows)} combinations in {execution_time:.4f} seconds")
+
+    if args.output:
+        save_results(rows, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import time
+
+import cv2
+import numpy as np
+
+"""
+Bit-packed binary images.
+
+A binary image stored as uint8 0/255 (a1_binary_to_selected_formats.py)
+spends a byte on every pixel. PackedBinary keeps 8 pixels per byte
+(np.packbits along each row, leftmost pixel in the most significant bit),
+so a mask takes 1/8 of the memory and every operation touches 1/8 of the
+bytes:
+
+    a & b, a | b, a ^ b, ~a     bytewise on the packed rows
+    count()                     popcount of the packed bytes
+    shift(dy, dx)               rows by slicing, columns by shifting bits across bytes
+    crop(y0, y1, x0, x1)        the same column shift, keeping only the window
+
+Unpacking to uint8 or bool happens only at the I/O boundary (from_image,
+to_uint8, read, write). The unused bits after the last pixel of each row
+are always kept at zero, so packed bytes compare and count correctly.
+"""
+
+# Keeps the first n bits (pixels) of a byte, n = 0..8
+_LEADING_BITS = np.array([(0xFF << (8 - n)) & 0xFF for n in range(9)], dtype=np.uint8)
+
+def _row_bytes(width):
+    return -(-width // 8)
+
+def _shift_columns(words, shift, out_bytes):
+    """Packed rows with every pixel moved `shift` columns right (negative: left), out_bytes bytes wide."""
+    height, in_bytes = words.shape
+    byte_shift, bit_shift = divmod(int(shift), 8)
+    # Output byte b takes bits from input bytes b - byte_shift - 1 and b - byte_shift
+    first = -byte_shift - 1
+    window = np.zeros((height, out_bytes + 1), dtype=np.uint8)
+    start, stop = max(first, 0), min(first + out_bytes + 1, in_bytes)
+    if start < stop:
+        window[:, start - first:stop - first] = words[:, start:stop]
+
+    if bit_shift == 0:
+        return window[:, 1:].copy()
+    out = window[:, 1:] >> bit_shift
+    out |= window[:, :-1] << (8 - bit_shift)
+    return out
+
+class PackedBinary:
+    """A height x width binary image stored as np.packbits rows (height x ceil(width / 8) uint8)."""
+
+    def __init__(self, words, width):
+        if words.dtype != np.uint8 or words.ndim != 2 or words.shape[1] != _row_bytes(width):
+            raise ValueError(f"words must be a 2-D uint8 array with {_row_bytes(width)} bytes per row, "
+                             f"got {words.dtype} {words.shape}")
+        self.words = words
+        self.width = width
+        self._clear_padding()
+
+    @classmethod
+    def from_image(cls, image, threshold=0):
+        """Pixels above threshold are 1. image is 2-D, of any dtype (bool, integer or float masks)."""
+        return cls(np.packbits(image > threshold, axis=1), image.shape[1])
+
+    @classmethod
+    def zeros(cls, height, width):
+        return cls(np.zeros((height, _row_bytes(width)), dtype=np.uint8), width)
+
+    @classmethod
+    def ones(cls, height, width):
+        return cls(np.full((height, _row_bytes(width)), 0xFF, dtype=np.uint8), width)
+
+    @classmethod
+    def checkerboard(cls, height, width):
+        """White where row + column is even, as in a1_binary_to_selected_formats.py."""
+        words = np.empty((height, _row_bytes(width)), dtype=np.uint8)
+        words[0::2] = 0b10101010
+        words[1::2] = 0b01010101
+        return cls(words, width)
+
+    @classmethod
+    def read(cls, path, threshold=127):
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise ValueError(f"Could not decode {path}")
+        return cls.from_image(image, threshold)
+
+    @property
+    def shape(self):
+        return (self.words.shape[0], self.width)
+
+    @property
+    def nbytes(self):
+        return self.words.nbytes
+
+    def _clear_padding(self):
+        if self.width % 8:
+            self.words[:, -1] &= _LEADING_BITS[self.width % 8]
+
+    def to_bool(self):
+        return np.unpackbits(self.words, axis=1, count=self.width).view(bool)
+
+    def to_uint8(self):
+        """0/255 uint8 image, as OpenCV and the image writers expect."""
+        image = np.unpackbits(self.words, axis=1, count=self.width)
+        image *= 255
+        return image
+
+    def write(self, path):
+        # 1 bit per pixel on disk for PNG too
+        params = [cv2.IMWRITE_PNG_BILEVEL, 1] if path.lower().endswith('.png') else []
+        if not cv2.imwrite(path, self.to_uint8(), params):
+            raise ValueError(f"Could not encode {path}")
+
+    def copy(self):
+        return PackedBinary(self.words.copy(), self.width)
+
+    def _check(self, other):
+        if self.shape != other.shape:
+            raise ValueError(f"Shapes differ: {self.shape} and {other.shape}")
+
+    def __and__(self, other):
+        self._check(other)
+        return PackedBinary(self.words & other.words, self.width)
+
+    def __or__(self, other):
+        self._check(other)
+        return PackedBinary(self.words | other.words, self.width)
+
+    def __xor__(self, other):
+        self._check(other)
+        return PackedBinary(self.words ^ other.words, self.width)
+
+    def __invert__(self):
+        # The constructor clears the padding bits NOT just set
+        return PackedBinary(~self.words, self.width)
+
+    def __iand__(self, other):
+        self._check(other)
+        self.words &= other.words
+        return self
+
+    def __ior__(self, other):
+        self._check(other)
+        self.words |= other.words
+        return self
+
+    def __ixor__(self, other):
+        self._check(other)
+        self.words ^= other.words
+        return self
+
+    def __eq__(self, other):
+        return isinstance(other, PackedBinary) and self.shape == other.shape and np.array_equal(self.words, other.words)
+
+    def count(self):
+        """Number of 1 pixels."""
+        return int(np.bitwise_count(self.words).sum(dtype=np.int64))
+
+    def shift(self, dy=0, dx=0):
+        """Image moved dy rows down and dx columns right (negative: up / left); vacated pixels are 0."""
+        height = self.words.shape[0]
+        words = self.words
+        if dy:
+            words = np.zeros_like(self.words)
+            if abs(dy) < height:
+                source = self.words[max(0, -dy):height - max(0, dy)]
+                words[max(0, dy):max(0, dy) + len(source)] = source
+        if dx:
+            words = _shift_columns(words, dx, words.shape[1])
+        elif not dy:
+            words = words.copy()
+        return PackedBinary(words, self.width)
+
+    def crop(self, y0, y1, x0, x1):
+        """Rows y0:y1 and columns x0:x1, like image[y0:y1, x0:x1]."""
+        height = self.words.shape[0]
+        y0, y1 = max(0, y0), min(height, y1)
+        x0, x1 = max(0, x0), min(self.width, x1)
+        width = max(0, x1 - x0)
+        rows = self.words[y0:max(y0, y1)]
+        if x0 % 8 == 0:
+            words = rows[:, x0 // 8:x0 // 8 + _row_bytes(width)].copy()
+        else:
+            words = _shift_columns(rows, -x0, _row_bytes(width))
+        return PackedBinary(words, width)
+
+    def __repr__(self):
+        return f"PackedBinary(shape={self.shape}, count={self.count()})"
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    a_image = (rng.random((8192, 8192)) > 0.5).astype(np.uint8) * 255
+    b_image = (rng.random((8192, 8192)) > 0.5).astype(np.uint8) * 255
+    a, b = PackedBinary.from_image(a_image), PackedBinary.from_image(b_image)
+    print(f"uint8: {a_image.nbytes / 2**20:.1f} MB, packed: {a.nbytes / 2**20:.1f} MB")
+
+    for name, unpacked, packed in (
+        ('AND', lambda: cv2.bitwise_and(a_image, b_image), lambda: a & b),
+        ('XOR + count', lambda: cv2.countNonZero(cv2.bitwise_xor(a_image, b_image)), lambda: (a ^ b).count()),
+        ('shift', lambda: np.roll(a_image, 3, axis=1), lambda: a.shift(0, 3)),
+    ):
+        start_time = time.time()
+        unpacked()
+        unpacked_time = time.time() - start_time
+        start_time = time.time()
+        packed()
+        packed_time = time.time() - start_time
+        print(f"{name}: uint8 {unpacked_time:.4f} seconds, packed {packed_time:.4f} seconds")
@@ -0,0 +1,152 @@
+import argparse
+import os
+import time
+import tracemalloc
+
+import numpy as np
+
+from imconvert import im2uint8
+
+try:
+    import tifffile
+except ImportError:  # only needed for reading TIFFs strip by strip and writing .tif output
+    tifffile = None
+
+"""
+Streaming im2uint8 for TIFFs too large to load whole.
+
+a1_matlab.py loads the whole TIFF with cv2.imread(..., cv2.IMREAD_UNCHANGED)
+before converting it. Here the TIFF is read one strip or tile at a time
+with tifffile, each chunk is converted to uint8 and written straight into
+a memory-mapped output (.npy, .tif/.tiff or raw). Uncompressed TIFFs are
+memory-mapped and read in row bands of about chunk_bytes instead.
+Compressed ones are decoded one segment at a time. Either way, the memory
+the process allocates depends on the chunk size, not the image size.
+Mapped file pages also show up in resident memory while they are in use,
+but they are page cache that the OS writes back and drops as needed.
+
+With autoscale, a first streaming pass finds the image's minimum and
+maximum (ignoring NaN), and the second pass maps [min, max] to [0, 255]
+(MATLAB's im2uint8(mat2gray(I))). This also makes integer classes that
+im2uint8 rejects, such as uint32, convertible. Without autoscale, values
+convert exactly as imconvert.im2uint8 converts them.
+
+Channel order is the TIFF's (RGB), not OpenCV's BGR.
+
+Usage:
+    python3 tiff_stream.py --input scan.tif --output scan_uint8.npy
+    python3 tiff_stream.py --input scan.tif --output scan_uint8.tif --autoscale --chunk-mb 8
+"""
+
+TIFF_EXTENSIONS = ('.tif', '.tiff')
+DEFAULT_CHUNK_BYTES = 16 * 1024 * 1024
+
+def _require_tifffile():
+    if tifffile is None:
+        raise ImportError("Streaming TIFF conversion needs the tifffile package")
+
+def create_output(path, shape, photometric=None):
+    """Writable memory-mapped uint8 destination (.npy, .tif/.tiff, or raw)."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.npy':
+        return np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8, shape=shape)
+    if extension in TIFF_EXTENSIONS:
+        _require_tifffile()
+        return tifffile.memmap(path, shape=shape, dtype=np.uint8, photometric=photometric)
+    return np.memmap(path, dtype=np.uint8, mode='w+', shape=shape)
+
+def iter_chunks(path, page, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Yields (index, chunk) pairs covering one TIFF page, where chunk is a
+    (depth, rows, columns, samples) array and index is the matching slice of
+    the page's 5-D shape (separate samples, depth, rows, columns, samples).
+    """
+    if page.is_memmappable:
+        mapped = tifffile.memmap(path, page=page.index, mode='r').reshape(page.shaped)
+        row_bytes = max(1, mapped[0, 0, :1].nbytes)
+        band_rows = max(1, chunk_bytes // row_bytes)
+        for s in range(mapped.shape[0]):
+            for d in range(mapped.shape[1]):
+                for h in range(0, mapped.shape[2], band_rows):
+                    index = (s, slice(d, d + 1), slice(h, h + band_rows))
+                    yield index, mapped[index]
+        return
+
+    # Decode strip by strip (or tile by tile); tiles on the right and bottom edges are padded
+    for segment, (s, d, h, w, _), shape in page.segments(maxworkers=1, buffersize=chunk_bytes):
+        if segment is None:
+            segment = np.full(shape, page.nodata, dtype=page.dtype)
+        segment = segment[:page.imagedepth - d, :page.imagelength - h, :page.imagewidth - w]
+        index = (s, slice(d, d + segment.shape[0]), slice(h, h + segment.shape[1]),
+                 slice(w, w + segment.shape[2]))
+        yield index, segment
+
+def value_range(path, page=0, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """Minimum and maximum of one TIFF page (NaN ignored), in one streaming pass."""
+    _require_tifffile()
+    low, high = np.inf, -np.inf
+    with tifffile.TiffFile(path) as tiff:
+        for _, chunk in iter_chunks(path, tiff.pages[page], chunk_bytes):
+            if chunk.dtype.kind == 'f':
+                if np.isnan(chunk).all():
+                    continue
+                low, high = min(low, np.nanmin(chunk)), max(high, np.nanmax(chunk))
+            elif chunk.size:
+                low, high = min(low, chunk.min()), max(high, chunk.max())
+    return float(low), float(high)
+
+def tiff_to_uint8(input_path, output_path, autoscale=False, page=0, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Parameters: input_path (str): TIFF file (any strip/tile layout and compression tifffile reads)
+                output_path (str): uint8 destination (.npy, .tif/.tiff, or raw)
+                autoscale: False for im2uint8's fixed ranges, True to stretch the image's
+                    [min, max] to [0, 255], or a (low, high) pair to stretch that range
+                page (int): page (image) of a multi-page TIFF
+                chunk_bytes (int): input bytes read at a time for uncompressed TIFFs
+    Returns: np.memmap: the uint8 output, shaped like the TIFF page
+    """
+    _require_tifffile()
+    if autoscale is True:
+        autoscale = value_range(input_path, page, chunk_bytes)
+
+    with tifffile.TiffFile(input_path) as tiff:
+        tiff_page = tiff.pages[page]
+        photometric = 'rgb' if tiff_page.samplesperpixel in (3, 4) else 'minisblack'
+        out = create_output(output_path, tiff_page.shape, photometric)
+        shaped = out.reshape(tiff_page.shaped)
+
+        if autoscale:
+            low, high = autoscale
+            scale = np.float32(1 / (high - low) if high > low else 0)
+        for index, chunk in iter_chunks(input_path, tiff_page, chunk_bytes):
+            if autoscale:
+                chunk = chunk.astype(np.float32)
+                chunk -= np.float32(low)
+                chunk *= scale
+            im2uint8(chunk, out=shaped[index])
+
+    out.flush()
+    return out
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a large TIFF to uint8 chunk by chunk")
+    parser.add_argument("--input", required=True, help="Source TIFF")
+    parser.add_argument("--output", required=True, help="Destination (.npy, .tif/.tiff, or raw)")
+    parser.add_argument("--autoscale", action="store_true", help="Stretch the image's [min, max] to [0, 255]")
+    parser.add_argument("--page", type=int, default=0, help="Page of a multi-page TIFF")
+    parser.add_argument("--chunk-mb", type=float, default=DEFAULT_CHUNK_BYTES / 2**20,
+                        help="Input megabytes read at a time (uncompressed TIFFs)")
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    start_time = time.time()
+    out = tiff_to_uint8(args.input, args.output, args.autoscale, args.page, int(args.chunk_mb * 2**20))
+    execution_time = time.time() - start_time
+    peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+
+    print(f"{args.input} -> {args.output} {out.shape} uint8")
+    print(f"Execution time: {execution_time:.4f} seconds, peak allocated memory {peak_mb:.1f} MB")
+
+if __name__ == "__main__":
+    main()
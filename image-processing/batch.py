@@ -0,0 +1,126 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from hsi import rgb_to_hsi
+from tiling import SHARPEN_KERNEL
+
+"""
+Headless batch mode for the sharpening and color-conversion scripts.
+
+sharpenning.py, rgb-to-hsi.py and the assignment_1 experiments show their
+results with cv2.imshow / plt.show, which blocks on a display. This applies
+the same operations to every image in a directory or glob and writes the
+results to an output directory instead. Decode, process and encode run in a
+process pool, one image per task.
+
+Operations:
+    sharpen      cv2.filter2D with the sharpenning.py kernel, saved in the input format
+    hsi          rgb_to_hsi, saved as float32 H,S,I .npy (hue in degrees)
+    imadd        cv2.add(image, value)        (assignment_1, experiment 1~2)
+    imsubtract   cv2.subtract(image, value)   (experiment 1~3)
+    immultiply   cv2.multiply(image, value)   (experiment 1~4)
+    imdivide     cv2.divide(image, value)     (experiment 1~5)
+
+Usage:
+    python3 batch.py --input "photos/*.jpg" --output sharpened --operation sharpen
+    python3 batch.py --input ../computer-vision/assignment_1 --output out --operation imadd --value 128
+"""
+
+IMAGE_EXTENSIONS = ('.bmp', '.jpeg', '.jpg', '.png', '.tif', '.tiff', '.webp')
+
+OPERATIONS = {
+    'sharpen': lambda image, value: cv2.filter2D(image, -1, SHARPEN_KERNEL),
+    'hsi': lambda image, value: rgb_to_hsi(image),
+    'imadd': lambda image, value: cv2.add(image, value),
+    'imsubtract': lambda image, value: cv2.subtract(image, value),
+    'immultiply': lambda image, value: cv2.multiply(image, value),
+    'imdivide': lambda image, value: cv2.divide(image, value),
+}
+
+def find_images(pattern):
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*')
+    paths = sorted(glob.glob(pattern))
+    return [path for path in paths if os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS]
+
+def output_path(path, output_dir, operation):
+    name, extension = os.path.splitext(os.path.basename(path))
+    if operation == 'hsi':
+        extension = '.npy'
+    return os.path.join(output_dir, f'{name}_{operation}{extension}')
+
+def process_image(path, output_dir, operation, value):
+    """Runs in a worker process. Returns (path, seconds) or raises on a bad image."""
+    start_time = time.perf_counter()
+    # The HSI conversion needs BGR; the assignment operations work on any depth
+    flags = cv2.IMREAD_COLOR if operation == 'hsi' else cv2.IMREAD_UNCHANGED
+    image = cv2.imread(path, flags)
+    if image is None:
+        raise ValueError(f"Could not decode {path}")
+
+    result = OPERATIONS[operation](image, value)
+    destination = output_path(path, output_dir, operation)
+    if operation == 'hsi':
+        np.save(destination, result)
+    elif not cv2.imwrite(destination, result):
+        raise ValueError(f"Could not encode {destination}")
+
+    return path, time.perf_counter() - start_time
+
+def _init_worker():
+    # One image per process already uses every core; avoid OpenCV oversubscription
+    cv2.setNumThreads(1)
+
+def run_batch(paths, output_dir, operation, value=0, workers=None):
+    """
+    Yields (path, seconds, error) per image in input order. error is None on
+    success, else the exception that image raised; the other images still run.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(process_image, path, output_dir, operation, value) for path in paths]
+        for path, future in zip(paths, futures):
+            try:
+                yield (*future.result(), None)
+            except Exception as error:
+                yield path, None, error
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless batch sharpening / HSI conversion")
+    parser.add_argument("--input", required=True, help="Input directory or glob, e.g. 'photos/*.jpg'")
+    parser.add_argument("--output", required=True, help="Output directory")
+    parser.add_argument("--operation", required=True, choices=sorted(OPERATIONS), help="Operation to apply")
+    parser.add_argument("--value", type=float, default=128, help="Operand for imadd/imsubtract/immultiply/imdivide")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    paths = find_images(args.input)
+    if not paths:
+        print(f"❌ No images found for {args.input}")
+        return
+
+    failed = []
+    start_time = time.time()
+    for path, seconds, error in run_batch(paths, args.output, args.operation, args.value, args.workers):
+        if error is None:
+            print(f"{path}: {seconds:.4f} seconds")
+        else:
+            failed.append(path)
+            print(f"❌ {path}: {error}")
+    execution_time = time.time() - start_time
+
+    processed = len(paths) - len(failed)
+    print(f"Processed {processed} images in {execution_time:.4f} seconds ({processed / execution_time:.2f} images/s)")
+    if failed:
+        print(f"❌ {len(failed)} failed: {', '.join(failed)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from hsi import hsi_to_rgb, rgb_to_hsi
+from out_of_core import _load_im2uint8
+from tiling import SHARPEN_KERNEL, default_workers, run_tiled, tiled_filter2D, tiled_hsi_to_rgb, tiled_rgb_to_hsi
+
+"""
+Benchmark suite for the color conversions, the sharpening filter and im2uint8.
+
+Every (operation, resolution, dtype, mode) case is timed and reported as
+megapixels per second, with the peak memory the call allocates on top of
+its input. Results are written as JSON; given a baseline JSON from an
+earlier run, cases that got slower by more than the tolerance are flagged
+as regressions and the exit status is 1.
+
+    single     the plain whole-image call
+    tiled      cache-sized row bands, one thread (tiling.run_tiled)
+    threaded   the same bands on all cores
+
+Peak memory is measured with tracemalloc in a separate, untimed run.
+NumPy and OpenCV's Python bindings allocate arrays through the traced
+allocator, so it covers outputs and temporaries.
+
+Usage:
+    python3 benchmark.py --output results.json
+    python3 benchmark.py --resolutions VGA FHD --dtypes uint8 --baseline results.json --output new.json
+"""
+
+RESOLUTIONS = {
+    'VGA': (480, 640),
+    'HD': (720, 1280),
+    'FHD': (1080, 1920),
+    '4K': (2160, 3840),
+    '8K': (4320, 7680),
+}
+DTYPES = ('uint8', 'uint16', 'float32', 'float64')
+MODES = ('single', 'tiled', 'threaded')
+DEFAULT_TOLERANCE = 0.10
+
+def _im2uint8_tiled(image, workers):
+    im2uint8 = _load_im2uint8()
+    out = np.empty(image.shape, dtype=np.uint8)
+
+    def convert_band(src, dst, top):
+        dst[...] = im2uint8(src)
+
+    return run_tiled(convert_band, image, out, 0, None, workers)
+
+# operation -> (supported input dtypes, {mode: run(input, workers)})
+# rgb_to_hsi takes BGR values in [0, 255]; hsi_to_rgb takes an interleaved H,S,I image
+OPERATIONS = {
+    'rgb_to_hsi': (('uint8', 'float32', 'float64'), {
+        'single': lambda image, workers: rgb_to_hsi(image),
+        'tiled': lambda image, workers: tiled_rgb_to_hsi(image, workers=1),
+        'threaded': lambda image, workers: tiled_rgb_to_hsi(image, workers=workers),
+    }),
+    'hsi_to_rgb': (('float32', 'float64'), {
+        'single': lambda hsi, workers: hsi_to_rgb(hsi[:, :, 0], hsi[:, :, 1], hsi[:, :, 2]),
+        'tiled': lambda hsi, workers: tiled_hsi_to_rgb(hsi, workers=1),
+        'threaded': lambda hsi, workers: tiled_hsi_to_rgb(hsi, workers=workers),
+    }),
+    'sharpen': (DTYPES, {
+        'single': lambda image, workers: cv2.filter2D(image, -1, SHARPEN_KERNEL),
+        'tiled': lambda image, workers: tiled_filter2D(image, SHARPEN_KERNEL, workers=1),
+        'threaded': lambda image, workers: tiled_filter2D(image, SHARPEN_KERNEL, workers=workers),
+    }),
+    'im2uint8': (DTYPES, {
+        'single': lambda image, workers: _load_im2uint8()(image),
+        'tiled': lambda image, workers: _im2uint8_tiled(image, 1),
+        'threaded': lambda image, workers: _im2uint8_tiled(image, workers),
+    }),
+}
+
+def make_input(operation, shape, dtype, rng):
+    """Random H x W x 3 input in the value range the operation expects for dtype."""
+    shape = shape + (3,)
+    if operation == 'hsi_to_rgb':
+        hsi = rng.random(shape, dtype=np.float64)
+        hsi[:, :, 0] *= 360
+        return hsi.astype(dtype)
+    if np.issubdtype(np.dtype(dtype), np.integer):
+        return rng.integers(0, np.iinfo(dtype).max, shape, dtype=dtype, endpoint=True)
+    image = rng.random(shape, dtype=np.float64)
+    if operation == 'rgb_to_hsi':
+        image *= 255
+    return image.astype(dtype)
+
+def peak_bytes(run, image, workers):
+    tracemalloc.start()
+    try:
+        run(image, workers)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def time_case(run, image, workers, repeats):
+    run(image, workers)  # warm-up: first-touch page faults, thread pool start, cached tables
+    timings = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        run(image, workers)
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+def case_key(case):
+    return f"{case['operation']}/{case['resolution']}/{case['dtype']}/{case['mode']}"
+
+def run_suite(operations=tuple(OPERATIONS), resolutions=tuple(RESOLUTIONS), dtypes=DTYPES, modes=MODES,
+              repeats=3, workers=None, log=print):
+    """Runs every supported case and returns the results as a JSON-serializable dict."""
+    workers = workers or default_workers()
+    rng = np.random.default_rng(0)
+    cases = []
+    for operation in operations:
+        supported, runners = OPERATIONS[operation]
+        for resolution in resolutions:
+            shape = RESOLUTIONS[resolution]
+            megapixels = shape[0] * shape[1] / 1e6
+            for dtype in dtypes:
+                if dtype not in supported:
+                    continue
+                image = make_input(operation, shape, dtype, rng)
+                for mode in modes:
+                    run = runners[mode]
+                    seconds = time_case(run, image, workers, repeats)
+                    case = {
+                        'operation': operation, 'resolution': resolution, 'dtype': dtype, 'mode': mode,
+                        'seconds': seconds,
+                        'megapixels_per_second': megapixels / seconds,
+                        'peak_bytes': peak_bytes(run, image, workers),
+                    }
+                    cases.append(case)
+                    if log:
+                        log(f"{case_key(case):<36}{case['megapixels_per_second']:10.1f} MP/s"
+                            f"{case['peak_bytes'] / 2**20:10.1f} MB peak")
+                del image
+
+    return {
+        'machine': {
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'workers': workers,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+        },
+        'repeats': repeats,
+        'cases': cases,
+    }
+
+def find_regressions(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Cases whose throughput fell more than tolerance (a fraction) below the baseline's."""
+    previous = {case_key(case): case for case in baseline['cases']}
+    regressions = []
+    for case in results['cases']:
+        before = previous.get(case_key(case))
+        if before is None:
+            continue
+        ratio = case['megapixels_per_second'] / before['megapixels_per_second']
+        if ratio < 1 - tolerance:
+            regressions.append({'case': case_key(case), 'baseline': before['megapixels_per_second'],
+                                'current': case['megapixels_per_second'], 'ratio': ratio})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark color conversions, sharpening and im2uint8")
+    parser.add_argument("--operations", nargs="+", choices=list(OPERATIONS), default=list(OPERATIONS))
+    parser.add_argument("--resolutions", nargs="+", choices=list(RESOLUTIONS), default=list(RESOLUTIONS))
+    parser.add_argument("--dtypes", nargs="+", choices=DTYPES, default=list(DTYPES))
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per case (the fastest is kept)")
+    parser.add_argument("--workers", type=int, default=None, help="Threads for the threaded mode (default: all cores)")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Earlier results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed throughput drop against the baseline, as a fraction")
+    args = parser.parse_args()
+
+    results = run_suite(args.operations, args.resolutions, args.dtypes, args.modes, args.repeats, args.workers)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = find_regressions(results, baseline, args.tolerance)
+        results['baseline'] = args.baseline
+        results['regressions'] = regressions
+        for regression in regressions:
+            print(f"REGRESSION {regression['case']}: {regression['baseline']:.1f} -> "
+                  f"{regression['current']:.1f} MP/s ({regression['ratio']:.2f}x)")
+        if not regressions:
+            print(f"No regressions against {args.baseline}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
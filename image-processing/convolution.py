@@ -0,0 +1,166 @@
+import time
+
+import cv2
+import numpy as np
+
+from tiling import SHARPEN_KERNEL
+
+"""
+General 2-D convolution that picks the fastest strategy for the kernel.
+
+All paths compute what cv2.filter2D(image, -1, kernel) computes:
+correlation with the kernel centred on each pixel, BORDER_REFLECT_101 at
+the edges, and the result rounded and saturated back to the input dtype.
+Separable and FFT results can differ from filter2D by float rounding,
+which is at most one level for integer images.
+
+    separable  rank-1 kernels (box, Gaussian, ...) are split by SVD into a
+               column and a row vector and run as two 1-D passes
+               (cv2.sepFilter2D): O(kh + kw) per pixel instead of O(kh * kw)
+    direct     everything else goes to cv2.filter2D, which already switches
+               to a tiled DFT internally for kernels of 11x11 and up
+    fft        explicit frequency-domain path; a stack of images shares one
+               kernel transform and goes through one batched rfft2/irfft2
+
+'auto' only picks between separable and direct: on the benchmark below
+(1080p, kernels up to 257x257, stacks of 8) the explicit FFT path never
+beat filter2D's built-in one, so it is used only when asked for. Rerun
+benchmark() on new hardware before changing that.
+"""
+
+# Relative size of the second singular value below which a kernel counts as rank 1
+SEPARABLE_TOLERANCE = 1e-6
+
+def gaussian_kernel(radius, sigma=None):
+    sigma = sigma or radius / 2
+    column = cv2.getGaussianKernel(2 * radius + 1, sigma)
+    return column @ column.T
+
+def unsharp_kernel(radius, amount=1.0, sigma=None):
+    """identity + amount * (identity - gaussian): a wide-radius sharpening kernel."""
+    blur = gaussian_kernel(radius, sigma)
+    identity = np.zeros_like(blur)
+    identity[radius, radius] = 1
+    return identity + amount * (identity - blur)
+
+PRESETS = {
+    'sharpen': SHARPEN_KERNEL,
+    'box5': np.full((5, 5), 1 / 25),
+    'gaussian7': gaussian_kernel(3),
+    'unsharp25': unsharp_kernel(12, amount=1.5),
+}
+
+def separate(kernel, tolerance=SEPARABLE_TOLERANCE):
+    """Returns (column, row) with outer(column, row) == kernel, or None if the kernel is not rank 1."""
+    u, s, vt = np.linalg.svd(np.asarray(kernel, dtype=np.float64))
+    if s[0] == 0 or (len(s) > 1 and s[1] > tolerance * s[0]):
+        return None
+    scale = np.sqrt(s[0])
+    return u[:, 0] * scale, vt[0] * scale
+
+def choose_method(kernel):
+    if kernel.size > 1 and separate(kernel) is not None:
+        return 'separable'
+    return 'direct'
+
+def _saturate(values, dtype, out=None):
+    if np.issubdtype(dtype, np.integer):
+        limits = np.iinfo(dtype)
+        values = np.clip(np.rint(values), limits.min, limits.max)
+    if out is None:
+        return values.astype(dtype)
+    np.copyto(out, values, casting='unsafe')
+    return out
+
+def _fft_convolve(images, kernel, out=None):
+    """images: N x H x W or N x H x W x C stack. One batched transform for the whole stack."""
+    kh, kw = kernel.shape
+    top, left = kh // 2, kw // 2
+    bottom, right = kh - 1 - top, kw - 1 - left
+    count, height, width = images.shape[:3]
+
+    # Match filter2D's BORDER_REFLECT_101 with explicit padding
+    padded = np.stack([
+        cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_REFLECT_101) for image in images
+    ]).astype(np.float32)
+    if padded.ndim == 3:
+        padded = padded[..., None]
+
+    # Circular convolution of size >= padded size never wraps into the valid region
+    fft_shape = (cv2.getOptimalDFTSize(padded.shape[1]), cv2.getOptimalDFTSize(padded.shape[2]))
+    flipped = np.ascontiguousarray(kernel[::-1, ::-1], dtype=np.float32)  # correlation -> convolution
+    kernel_spectrum = np.fft.rfft2(flipped, s=fft_shape)[None, :, :, None]
+    spectrum = np.fft.rfft2(padded, s=fft_shape, axes=(1, 2))
+    spectrum *= kernel_spectrum
+    result = np.fft.irfft2(spectrum, s=fft_shape, axes=(1, 2))
+    result = result[:, kh - 1:kh - 1 + height, kw - 1:kw - 1 + width].reshape(images.shape)
+
+    return _saturate(result, images.dtype, out)
+
+def convolve(image, kernel, method='auto', out=None):
+    """
+    Parameters: image (np.ndarray): H x W or H x W x C image
+                kernel (np.ndarray | str): 2-D kernel, or a name from PRESETS
+                method (str): 'auto', 'direct', 'separable' or 'fft'
+                out (np.ndarray): optional buffer with image's shape and dtype
+    Returns: np.ndarray: the filtered image, as cv2.filter2D(image, -1, kernel) would return it
+    """
+    if isinstance(kernel, str):
+        kernel = PRESETS[kernel]
+    kernel = np.asarray(kernel, dtype=np.float32)
+    if method == 'auto':
+        method = choose_method(kernel)
+
+    if method == 'fft':
+        result = _fft_convolve(image[None], kernel)[0]
+    elif method == 'separable':
+        parts = separate(kernel)
+        if parts is None:
+            raise ValueError("Kernel is not separable (rank > 1)")
+        column, row = parts
+        result = cv2.sepFilter2D(image, -1, row.astype(np.float32), column.astype(np.float32))
+    elif method == 'direct':
+        result = cv2.filter2D(image, -1, kernel)
+    else:
+        raise ValueError(f"Unknown method {method!r}")
+
+    if out is None:
+        return result
+    out[...] = result
+    return out
+
+def convolve_stack(images, kernel, method='auto', out=None):
+    """Filters a stack of same-sized images (N x H x W[ x C]). method='fft' handles the stack in one call."""
+    if isinstance(kernel, str):
+        kernel = PRESETS[kernel]
+    kernel = np.asarray(kernel, dtype=np.float32)
+    if method == 'auto':
+        method = choose_method(kernel)
+
+    if method == 'fft':
+        return _fft_convolve(images, kernel, out)
+
+    out = np.empty_like(images) if out is None else out
+    for index, image in enumerate(images):
+        convolve(image, kernel, method, out[index])
+    return out
+
+def benchmark(radii=(1, 2, 4, 8, 16, 32), shape=(1080, 1920, 3), repeats=3):
+    """Times every applicable strategy for Gaussian (separable) and unsharp (non-separable) kernels."""
+    image = np.random.default_rng(0).integers(0, 256, shape, dtype=np.uint8)
+    rows = []
+    for radius in radii:
+        for name, kernel in (('gaussian', gaussian_kernel(radius)), ('unsharp', unsharp_kernel(radius))):
+            methods = ['direct', 'fft'] + (['separable'] if separate(kernel) is not None else [])
+            for method in methods:
+                start_time = time.perf_counter()
+                for _ in range(repeats):
+                    convolve(image, kernel, method)
+                seconds = (time.perf_counter() - start_time) / repeats
+                rows.append((name, 2 * radius + 1, method, seconds, method == choose_method(kernel)))
+    return rows
+
+if __name__ == "__main__":
+    print(f"{'kernel':<10}{'size':>6}  {'method':<10}{'seconds':>10}  auto")
+    for name, size, method, seconds, chosen in benchmark():
+        print(f"{name:<10}{size:>6}  {method:<10}{seconds:>10.4f}  {'*' if chosen else ''}")
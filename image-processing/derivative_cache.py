@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from hsi import rgb_to_hsi
+from hsi_adjust import adjust_hsi
+from tiling import tiled_sharpen
+from unsharp import unsharp_mask
+
+"""
+Content-addressed cache for processed image derivatives.
+
+An entry's name is a hash of the source file's bytes, the operation name
+and its parameters, so renaming or copying a source still hits, and editing
+it (or changing a parameter) misses. A hit loads the stored result and
+never decodes the source or runs the operation. The source still has to be
+hashed, but its digest is remembered per (path, size, mtime) for the life
+of the cache object.
+
+Results are stored as compressed NPY (np.savez_compressed, any dtype and
+shape) or PNG (uint8/uint16 with 1, 3 or 4 channels, lossless). Writes go
+to a temporary file beside the entry and are renamed into place, so
+concurrent processes never read a partial entry; two processes computing
+the same entry just both write it. Least recently used entries (by file
+mtime, bumped on every hit) are evicted once the cache grows past
+max_bytes.
+"""
+
+# Bump when an operation's output changes so stale entries stop matching
+CACHE_VERSION = 2
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+DIGEST_SIZE = 16
+FORMATS = {'npz': '.npz', 'png': '.png'}
+
+OPERATIONS = {
+    'sharpen': lambda image: tiled_sharpen(image),
+    'hsi': lambda image: rgb_to_hsi(image),
+    'unsharp': lambda image, amount=1.0, radius=2.0, threshold=0: unsharp_mask(image, amount, radius, threshold),
+    'adjust_hsi': lambda image, saturation_gain=1.0, hue_shift=0.0:
+        adjust_hsi(image, saturation_gain=saturation_gain, hue_shift=hue_shift),
+}
+# Operations that need an 8-bit BGR image; grayscale sources are decoded as 3 equal channels
+COLOR_OPERATIONS = ('hsi', 'adjust_hsi')
+
+def file_digest(path, chunk_bytes=1024 * 1024):
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    with open(path, 'rb') as file:
+        while chunk := file.read(chunk_bytes):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class DerivativeCache:
+    """
+    get(source_path, operation, **params) returns the operation's result on the
+    decoded source, computing and storing it on a miss.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, format='npz', operations=OPERATIONS):
+        if format not in FORMATS:
+            raise ValueError(f"format must be one of {sorted(FORMATS)}, got {format!r}")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.format = format
+        self.operations = operations
+        self.digests = {}
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def source_digest(self, path):
+        stat = os.stat(path)
+        identity = (os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+        if identity not in self.digests:
+            self.digests[identity] = file_digest(path)
+        return self.digests[identity]
+
+    def key(self, source_digest, operation, params):
+        description = json.dumps({'version': CACHE_VERSION, 'source': source_digest,
+                                  'operation': operation, 'params': params}, sort_keys=True)
+        return hashlib.blake2b(description.encode(), digest_size=DIGEST_SIZE).hexdigest()
+
+    def entry_path(self, key, format=None):
+        return os.path.join(self.directory, key + FORMATS[format or self.format])
+
+    def get(self, source_path, operation, format=None, **params):
+        if operation not in self.operations:
+            raise ValueError(f"Unknown operation {operation!r}, expected one of {sorted(self.operations)}")
+        format = format or self.format
+
+        path = self.entry_path(self.key(self.source_digest(source_path), operation, params), format)
+        if os.path.exists(path):
+            try:
+                result = self.load(path)
+                os.utime(path)
+                self.hits += 1
+                return result
+            except FileNotFoundError:
+                pass  # evicted by another process between the check and the load
+
+        self.misses += 1
+        flags = cv2.IMREAD_COLOR if operation in COLOR_OPERATIONS else cv2.IMREAD_UNCHANGED
+        image = cv2.imread(source_path, flags)
+        if image is None:
+            raise ValueError(f"Could not decode {source_path}")
+        result = self.operations[operation](image, **params)
+        self.store(path, result)
+        self.evict(keep=path)
+        return result
+
+    def load(self, path):
+        if path.endswith(FORMATS['png']):
+            result = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+            if result is None:
+                raise ValueError(f"Corrupt cache entry {path}")
+            return result
+        with np.load(path) as entry:
+            return entry['image']
+
+    def store(self, path, result):
+        # Write beside the target and rename so readers never see a partial file
+        temporary_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            if path.endswith(FORMATS['png']):
+                if result.dtype not in (np.uint8, np.uint16) or (result.ndim == 3 and result.shape[2] not in (1, 3, 4)):
+                    raise ValueError(f"PNG entries need a uint8/uint16 image with 1, 3 or 4 channels, "
+                                     f"got {result.dtype} {result.shape}; use format='npz'")
+                ok, encoded = cv2.imencode('.png', result)
+                if not ok:
+                    raise ValueError(f"Could not encode {path}")
+                with open(temporary_path, 'wb') as file:
+                    file.write(encoded.tobytes())
+            else:
+                with open(temporary_path, 'wb') as file:
+                    np.savez_compressed(file, image=result)
+            os.replace(temporary_path, path)
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    def entries(self):
+        suffixes = tuple(FORMATS.values())
+        with os.scandir(self.directory) as scanner:
+            return [entry for entry in scanner if entry.name.endswith(suffixes)]
+
+    def size(self):
+        return sum(entry.stat().st_size for entry in self.entries())
+
+    def evict(self, keep=None):
+        entries = []
+        for entry in self.entries():
+            try:
+                entries.append((entry.stat().st_mtime, entry.stat().st_size, entry.path))
+            except FileNotFoundError:
+                pass  # evicted by another process
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            total_bytes -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        for entry in self.entries():
+            os.remove(entry.path)
+
+if __name__ == "__main__":
+    import tempfile
+
+    cache = DerivativeCache(os.path.join(tempfile.gettempdir(), 'derivative-cache'))
+
+    for attempt in ('Miss', 'Hit'):
+        start_time = time.time()
+        sharpened = cache.get('input.jpeg', 'sharpen')
+        hsi = cache.get('input.jpeg', 'hsi')
+        unsharp = cache.get('input.jpeg', 'unsharp', amount=1.5, radius=10)
+        execution_time = time.time() - start_time
+        print(f"{attempt}: {execution_time:.4f} seconds")
+
+    print(f"{cache.hits} hits, {cache.misses} misses, {cache.size() / 2**20:.1f} MB on disk")
+
+    # Grayscale sources go through the color operations too
+    cameraman = os.path.join('..', 'computer-vision', 'assignment_1', 'cameraman.tif')
+    for operation in COLOR_OPERATIONS:
+        result = cache.get(cameraman, operation)
+        assert result.ndim == 3 and result.shape[2] == 3, (operation, result.shape)
+    cache.clear()
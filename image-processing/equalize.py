@@ -0,0 +1,142 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from hsi import hsi_to_rgb, rgb_to_hsi
+from tiling import default_workers, row_bands
+
+"""
+Histogram equalization of the HSI intensity channel.
+
+Only I is changed, so hue and saturation (the colors) stay as they are,
+unlike equalizing B, G and R separately. Intensity is quantized to `bins`
+levels and histogrammed with np.bincount.
+
+    global  one histogram and mapping for the whole image
+    clahe   contrast-limited adaptive equalization: one clipped histogram
+            per tile, all tiles counted in a single bincount over
+            (tile, level) pairs, and each pixel's new intensity bilinearly
+            blended from the mappings of the four nearest tile centres so
+            no tile seams show. The blending runs on row bands in a
+            thread pool.
+
+Tiling, clipping and blending follow cv2.createCLAHE: an image that does
+not divide into the tile grid is padded by reflection (BORDER_REFLECT_101)
+so every tile is full, the clip limit is a whole count, and the clipped
+excess is spread evenly with the remainder going to every
+(bins // remainder)-th level. On the same quantized intensities the
+result stays within one level (the rounding of OpenCV's 8-bit lookup
+tables) of cv2.createCLAHE, and cv2.equalizeHist for 'global'.
+"""
+
+DEFAULT_BINS = 256
+
+def quantize_intensity(I, bins=DEFAULT_BINS):
+    levels = np.rint(I * np.float32(bins - 1))
+    np.clip(levels, 0, bins - 1, out=levels)
+    return levels.astype(np.intp)
+
+def equalize_global(I, bins=DEFAULT_BINS):
+    levels = quantize_intensity(I, bins)
+    cdf = np.cumsum(np.bincount(levels.ravel(), minlength=bins))
+    lowest = cdf[cdf > 0][0]
+    if cdf[-1] == lowest:
+        return I.astype(np.float32)  # a single level: nothing to spread, like cv2.equalizeHist
+    mapping = (cdf - lowest) / max(1, cdf[-1] - lowest)
+    return mapping.astype(np.float32)[levels]
+
+def tile_mappings(levels, tiles, bins, clip_limit):
+    """Clipped, equalized mapping per tile: array of shape (tiles_y, tiles_x, bins)."""
+    height, width = levels.shape
+    tiles_y, tiles_x = tiles
+    # Pad to whole tiles so no tile is empty or partial. Like OpenCV, once one side needs
+    # padding both get (tiles - size % tiles) extra rows/columns, even a side that divides.
+    padded = levels
+    if height % tiles_y or width % tiles_x:
+        padding = ((0, tiles_y - height % tiles_y), (0, tiles_x - width % tiles_x))
+        padded = np.pad(levels, padding, mode='reflect')  # NumPy's reflect is BORDER_REFLECT_101
+    tile_h, tile_w = padded.shape[0] // tiles_y, padded.shape[1] // tiles_x
+
+    tile_row = np.arange(padded.shape[0]) // tile_h
+    tile_col = np.arange(padded.shape[1]) // tile_w
+    cell = (tile_row[:, None] * tiles_x + tile_col[None, :]) * bins + padded
+    histograms = np.bincount(cell.ravel(), minlength=tiles_y * tiles_x * bins)
+    histograms = histograms.reshape(tiles_y, tiles_x, bins)
+
+    if clip_limit > 0:
+        # Clip each histogram and spread the excess evenly, the remainder one count per
+        # (bins // remainder) levels from the first
+        limit = max(1, int(clip_limit * tile_h * tile_w / bins))
+        excess = np.maximum(histograms - limit, 0).sum(axis=2, keepdims=True)
+        np.minimum(histograms, limit, out=histograms)
+        histograms += excess // bins
+        remainder = excess % bins
+        step = np.maximum(bins // np.maximum(remainder, 1), 1)
+        level = np.arange(bins)
+        histograms += (level % step == 0) & (level // step < remainder)
+
+    cdf = np.cumsum(histograms, axis=2)
+    return cdf / np.float32(tile_h * tile_w), (tile_h, tile_w)
+
+def _blend_weights(size, tile_size, tile_count):
+    # Lower neighbouring tile centre and the weight of the upper one, per row/column (OpenCV's coordinates)
+    position = np.arange(size) / tile_size - 0.5
+    lower = np.floor(position)
+    weight = (position - lower).astype(np.float32)
+    upper = np.clip(lower + 1, 0, tile_count - 1).astype(np.intp)
+    lower = np.clip(lower, 0, tile_count - 1).astype(np.intp)
+    return lower, upper, weight
+
+def equalize_clahe(I, tiles=(8, 8), clip_limit=2.0, bins=DEFAULT_BINS, workers=None):
+    levels = quantize_intensity(I, bins)
+    mappings, (tile_h, tile_w) = tile_mappings(levels, tiles, bins, clip_limit)
+    mappings = mappings.astype(np.float32)
+    y0, y1, wy = _blend_weights(I.shape[0], tile_h, tiles[0])
+    x0, x1, wx = _blend_weights(I.shape[1], tile_w, tiles[1])
+    wx = wx[None, :]
+    out = np.empty(I.shape, dtype=np.float32)
+
+    def blend_band(band):
+        start, stop = band
+        band_levels = levels[start:stop]
+        top, bottom = y0[start:stop, None], y1[start:stop, None]
+        upper = mappings[top, x0, band_levels] * (1 - wx) + mappings[top, x1, band_levels] * wx
+        lower = mappings[bottom, x0, band_levels] * (1 - wx) + mappings[bottom, x1, band_levels] * wx
+        weight = wy[start:stop, None]
+        out[start:stop] = upper * (1 - weight) + lower * weight
+
+    workers = workers or default_workers()
+    bands = row_bands(I.shape[0], max(1, tile_h // 2))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(blend_band, bands))
+    return out
+
+def equalize_intensity(image, method='global', tiles=(8, 8), clip_limit=2.0, bins=DEFAULT_BINS, workers=None):
+    """
+    Parameters: image (np.ndarray): H x W x 3 uint8 BGR image (OpenCV order)
+                method (str): 'global' or 'clahe'
+                tiles (tuple): CLAHE tile grid (rows, columns)
+                clip_limit (float): CLAHE histogram clip, as a multiple of the average bin count
+                bins (int): intensity quantization levels
+                workers (int): threads for the CLAHE blending stage (default: all cores)
+    Returns: np.ndarray: the equalized BGR uint8 image
+    """
+    hsi = rgb_to_hsi(image)
+    if method == 'global':
+        I = equalize_global(hsi[:, :, 2], bins)
+    elif method == 'clahe':
+        I = equalize_clahe(hsi[:, :, 2], tiles, clip_limit, bins, workers)
+    else:
+        raise ValueError(f"method must be 'global' or 'clahe', got {method!r}")
+    return hsi_to_rgb(hsi[:, :, 0], hsi[:, :, 1], I)
+
+if __name__ == "__main__":
+    image = cv2.imread('input.jpeg')
+
+    for method in ('global', 'clahe'):
+        start_time = time.time()
+        equalized = equalize_intensity(image, method)
+        execution_time = time.time() - start_time
+        print(f"{method}: {execution_time:.4f} seconds")
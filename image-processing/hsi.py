@@ -0,0 +1,156 @@
+import numpy as np
+
+"""
+Allocation-free RGB <-> HSI conversion.
+
+Same math as rgb-to-hsi.py and hsi-to-rgb.py, but every intermediate lives
+in a scratch HSIWorkspace that is reused across frames, and results are
+written straight into caller-provided interleaved buffers (no cv2.merge
+copy, no per-sector masks). Hue is in degrees, saturation and intensity
+in [0, 1], all float32.
+"""
+
+EPSILON = np.float32(1e-6)  # avoids division by zero, same as rgb-to-hsi.py
+FULL_TURN = np.float32(360)
+SECTOR = np.float32(120)
+MAX_8BIT = np.float32(255)
+
+# hsi_to_rgb computes three values per pixel: the low channel I(1-S), the
+# high channel from the cosine ratio, and the remainder 3I - (low + high).
+# Which of B,G,R (output order) each role lands in depends on the sector.
+# ROLE_OF[sector, channel] -> index of the role that fills that channel.
+LOW, HIGH, REST = 0, 1, 2
+ROLE_OF = np.array([
+    [LOW, REST, HIGH],  # RG sector (0-120):   B low, R high, G rest
+    [REST, HIGH, LOW],  # GB sector (120-240): R low, G high, B rest
+    [HIGH, LOW, REST],  # BR sector (240-360): G low, B high, R rest
+], dtype=np.uint8)
+
+class HSIWorkspace:
+    """Per-frame scratch planes. Reallocated only when the frame size changes."""
+
+    PLANES = 7
+
+    def __init__(self, shape=None):
+        self.shape = None
+        if shape is not None:
+            self.ensure(shape)
+
+    def ensure(self, shape):
+        shape = tuple(shape)
+        if shape != self.shape:
+            self.shape = shape
+            self.planes = np.empty((self.PLANES,) + shape, dtype=np.float32)
+            self.mask = np.empty(shape, dtype=bool)
+            self.sector = np.empty(shape, dtype=np.uint8)
+            self.role = np.empty(shape, dtype=np.uint8)
+            self.bytes = np.empty((3,) + shape, dtype=np.uint8)
+        return self
+
+def _output(out, shape, dtype):
+    if out is None:
+        return np.empty(shape, dtype=dtype)
+    if out.shape != shape or out.dtype != dtype:
+        raise ValueError(f"out must be {np.dtype(dtype)} with shape {shape}, got {out.dtype} {out.shape}")
+    return out
+
+def rgb_to_hsi(image, out=None, workspace=None):
+    """
+    Parameters: image (np.ndarray): H x W x 3 BGR image (OpenCV order), values in [0, 255]
+                out (np.ndarray): optional H x W x 3 float32 buffer for the H,S,I result
+                workspace (HSIWorkspace): optional scratch buffers to reuse across frames
+    Returns: np.ndarray: out, holding hue (degrees), saturation and intensity
+    """
+    out = _output(out, image.shape[:2] + (3,), np.float32)
+    workspace = (workspace or HSIWorkspace()).ensure(image.shape[:2])
+    R, G, B, t1, t2, t3, t4 = workspace.planes
+    H, S, I = out[:, :, 0], out[:, :, 1], out[:, :, 2]
+
+    # Normalize to [0,1] (OpenCV loads in BGR order)
+    np.divide(image[:, :, 2], MAX_8BIT, out=R)
+    np.divide(image[:, :, 1], MAX_8BIT, out=G)
+    np.divide(image[:, :, 0], MAX_8BIT, out=B)
+
+    # Intensity
+    np.add(R, G, out=t1)
+    t1 += B
+    np.divide(t1, np.float32(3), out=I)
+
+    # Saturation
+    np.minimum(R, G, out=t2)
+    np.minimum(t2, B, out=t2)
+    t1 += EPSILON
+    np.divide(np.float32(3), t1, out=t1)
+    t1 *= t2
+    np.subtract(np.float32(1), t1, out=S)
+
+    # Hue
+    np.subtract(R, G, out=t1)
+    np.subtract(R, B, out=t2)
+    np.subtract(G, B, out=t3)
+    np.less(t3, 0, out=workspace.mask)  # B > G: hue is in the lower half turn
+    np.add(t1, t2, out=t4)
+    t4 *= np.float32(0.5)
+    t1 *= t1
+    t2 *= t3
+    t1 += t2
+    np.sqrt(t1, out=t1)
+    t1 += EPSILON
+    t4 /= t1
+    np.clip(t4, -1, 1, out=t4)  # Clip for numerical stability
+    np.arccos(t4, out=t4)
+    np.degrees(t4, out=H)
+    np.subtract(FULL_TURN, H, out=H, where=workspace.mask)
+
+    return out
+
+def hsi_to_rgb(H, S, I, out=None, workspace=None):
+    """
+    Parameters: H (np.ndarray): hue in degrees (any value, wrapped into [0, 360))
+                S, I (np.ndarray): saturation and intensity in [0, 1], same shape as H
+                out (np.ndarray): optional H.shape + (3,) uint8 buffer
+                workspace (HSIWorkspace): optional scratch buffers to reuse across frames
+    Returns: np.ndarray: out, the image in BGR order (OpenCV order, like rgb_to_hsi's input)
+    """
+    out = _output(out, H.shape + (3,), np.uint8)
+    workspace = (workspace or HSIWorkspace()).ensure(H.shape)
+    angle, t, low, high, rest = workspace.planes[:5]
+    sector = workspace.sector
+
+    # Sector index once; H = 360 wraps to 0 instead of falling outside every sector
+    np.remainder(H, FULL_TURN, out=angle)
+    np.floor_divide(angle, SECTOR, out=t)
+    np.minimum(t, 2, out=t)
+    np.copyto(sector, t, casting='unsafe')
+
+    # Rotate every angle into its sector's [0, 120) range
+    t *= SECTOR
+    angle -= t
+    np.radians(angle, out=angle)
+
+    np.subtract(np.float32(np.pi / 3), angle, out=t)
+    np.cos(t, out=t)
+    np.cos(angle, out=high)
+    high /= t
+    high *= S
+    high += np.float32(1)
+    high *= I
+
+    np.subtract(np.float32(1), S, out=low)
+    low *= I
+
+    np.multiply(I, np.float32(3), out=rest)
+    rest -= low
+    rest -= high
+
+    # Scale to 0-255 and clip, once per role
+    for role, values in enumerate((low, high, rest)):
+        values *= MAX_8BIT
+        np.clip(values, 0, MAX_8BIT, out=values)
+        np.copyto(workspace.bytes[role], values, casting='unsafe')
+
+    for channel in range(3):
+        np.take(ROLE_OF[:, channel], sector, out=workspace.role)
+        np.choose(workspace.role, workspace.bytes, out=out[..., channel])
+
+    return out
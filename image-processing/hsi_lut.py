@@ -0,0 +1,228 @@
+import os
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from hsi import FULL_TURN, _output, hsi_to_rgb, rgb_to_hsi
+
+"""
+Lookup-table HSI conversion for 8-bit images.
+
+Forward (rgb_to_hsi_lut): for 8-bit input, hue depends only on the chroma
+differences (R-G, R-B), saturation only on (min, R+G+B) and intensity only
+on R+G+B. Each is a small 2-D/1-D table, so arccos/sqrt per pixel become a
+table gather with the same float32 results as rgb_to_hsi. The gathers are
+cv2.remap calls with INTER_NEAREST: the table is the "image" and a pair of
+int16 planes gives the cell to read, one for hue and one for the fused
+(saturation, intensity) table. That is about 2x faster than rgb_to_hsi
+at 4K (1.4x on input.jpeg). np.take with int32 indices was no faster
+than the direct path, since NumPy widens every index to 64 bits first.
+cv2.remap only takes outputs with sides below 32767, so gather_hsi works
+in blocks of up to REMAP_BLOCK x REMAP_BLOCK pixels.
+
+Reverse (hsi_to_rgb_lut): a 3-D grid of BGR values sampled over hue,
+saturation and intensity, read with one nearest-node gather per pixel.
+The grid resolution is the accuracy/speed knob: coarser grids stay in
+cache, finer ones track hsi_to_rgb more closely.
+
+Tables are built with the functions in hsi.py, so they agree with the
+direct conversion at every sample point, and are cached on disk as .npy
+files the first time they are needed.
+"""
+
+LUT_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'hsi-lut')
+LUT_VERSION = 1
+
+CHROMA_RANGE = 511  # R-G and R-B both lie in [-255, 255]
+SUM_RANGE = 766     # R+G+B lies in [0, 765]
+LEVELS = 256
+REMAP_BLOCK = 16384  # rows and columns per cv2.remap call, below its 32767 (SHRT_MAX) limit
+
+def _cached(name, build, directory=None):
+    directory = directory or LUT_DIR
+    path = os.path.join(directory, f'{name}.v{LUT_VERSION}.npy')
+    if os.path.exists(path):
+        return np.load(path, mmap_mode='r')
+
+    table = build()
+    os.makedirs(directory, exist_ok=True)
+    # Write beside the target and rename so concurrent builders never see a partial file
+    temporary_path = f'{path}.{os.getpid()}.tmp.npy'
+    np.save(temporary_path, table)
+    os.replace(temporary_path, path)
+    return table
+
+@lru_cache(maxsize=None)
+def hue_table():
+    """Hue (degrees) indexed by [R - G + 255, R - B + 255]."""
+    def build():
+        diffs = np.arange(CHROMA_RANGE) - 255
+        d1, d2 = np.meshgrid(diffs, diffs, indexing='ij')
+
+        # Any pixel with these differences gives the same hue; pick the darkest one
+        R = np.maximum(np.maximum(d1, d2), 0)
+        pixels = np.clip(np.stack([R - d2, R - d1, R], axis=-1), 0, 255).astype(np.uint8)
+        return np.ascontiguousarray(rgb_to_hsi(pixels)[:, :, 0])
+
+    return _cached('hue', build)
+
+@lru_cache(maxsize=None)
+def saturation_table():
+    """Saturation indexed by [min(R, G, B), R + G + B]."""
+    def build():
+        lowest = np.arange(LEVELS, dtype=np.float32)[:, None] / np.float32(255)
+        total = np.arange(SUM_RANGE, dtype=np.float32)[None, :] / np.float32(255)
+        return 1 - (3 / (total + np.float32(1e-6))) * lowest
+
+    return _cached('saturation', build)
+
+@lru_cache(maxsize=None)
+def intensity_table():
+    """Intensity indexed by R + G + B."""
+    return _cached('intensity', lambda: np.arange(SUM_RANGE, dtype=np.float32) / np.float32(255) / np.float32(3))
+
+@lru_cache(maxsize=None)
+def saturation_intensity_table():
+    """(Saturation, intensity) pairs indexed by [min(R, G, B), R + G + B], for one gather per pixel."""
+    saturation = saturation_table()
+    intensity = np.broadcast_to(intensity_table(), saturation.shape)
+    return np.ascontiguousarray(np.stack([saturation, intensity], axis=-1))
+
+@lru_cache(maxsize=None)
+def rgb_grid(hue_step=1, levels=64):
+    """BGR uint8 values on a (hue, saturation, intensity) grid, hue every hue_step degrees."""
+    def build():
+        hues = np.arange(0, 360, hue_step, dtype=np.float32)
+        samples = np.linspace(0, 1, levels, dtype=np.float32)
+        H, S, I = np.meshgrid(hues, samples, samples, indexing='ij')
+        return hsi_to_rgb(H, S, I)
+
+    return _cached(f'rgb-grid-h{hue_step}-l{levels}', build)
+
+class LUTWorkspace:
+    """
+    Scratch planes for the table coordinates and gathers, one remap block in
+    size. Reallocated only when the block size or table dtype changes.
+    """
+
+    def __init__(self, shape=None, dtype=np.float32):
+        self.shape = None
+        self.dtype = None
+        if shape is not None:
+            self.ensure(shape, dtype)
+
+    def ensure(self, shape, dtype=np.float32):
+        shape, dtype = tuple(shape), np.dtype(dtype)
+        if shape != self.shape or dtype != self.dtype:
+            self.shape, self.dtype = shape, dtype
+            self.column, self.row = np.empty((2,) + shape, dtype=np.int16)
+            self.lowest = np.empty(shape, dtype=np.uint8)
+            # (column, row) pairs, the cv2.remap CV_16SC2 map layout
+            self.hue_cells = np.empty(shape + (2,), dtype=np.int16)
+            self.sum_cells = np.empty(shape + (2,), dtype=np.int16)
+            self.hue = np.empty(shape, dtype=dtype)
+            self.saturation_intensity = np.empty(shape + (2,), dtype=dtype)
+        return self
+
+def _writable_in_place(array):
+    # OpenCV writes into arrays whose pixels are side by side within each row; others it copies
+    return array.strides[-1] == array.itemsize and array.strides[-2] == array.itemsize * array.shape[-1]
+
+def _gather_block(image, hue_table, saturation_intensity_table, dst, workspace):
+    height, width = image.shape[:2]
+    column, row = workspace.column[:height, :width], workspace.row[:height, :width]
+    lowest = workspace.lowest[:height, :width]
+    hue_cells, sum_cells = workspace.hue_cells[:height, :width], workspace.sum_cells[:height, :width]
+    hue, saturation_intensity = workspace.hue[:height, :width], workspace.saturation_intensity[:height, :width]
+    # Contiguous planes; NumPy arithmetic on the interleaved channels is several times slower
+    B, G, R = cv2.split(image)
+
+    # Hue: the (R-G, R-B) cell, row R-G
+    np.subtract(R, B, out=column, dtype=np.int16)
+    column += 255
+    np.subtract(R, G, out=row, dtype=np.int16)
+    row += 255
+    cv2.merge([column, row], dst=hue_cells)
+    cv2.remap(hue_table, hue_cells, None, cv2.INTER_NEAREST, dst=hue)
+
+    # Saturation and intensity: the (min, R+G+B) cell, row min
+    np.add(R, G, out=column, dtype=np.int16)
+    column += B
+    cv2.min(R, G, dst=lowest)
+    cv2.min(lowest, B, dst=lowest)
+    np.copyto(row, lowest)
+    cv2.merge([column, row], dst=sum_cells)
+    cv2.remap(saturation_intensity_table, sum_cells, None, cv2.INTER_NEAREST, dst=saturation_intensity)
+
+    if _writable_in_place(dst):
+        cv2.merge([hue, saturation_intensity], dst=dst)
+    else:
+        dst[...] = cv2.merge([hue, saturation_intensity])
+
+def gather_hsi(image, hue_table, saturation_intensity_table, dst, workspace=None):
+    """
+    Per-pixel table gather shared by the 8-bit HSI conversions.
+    Parameters: image (np.ndarray): H x W x 3 uint8 BGR image (OpenCV order)
+                hue_table (np.ndarray): 511 x 511 hue, indexed by [R - G + 255, R - B + 255]
+                saturation_intensity_table (np.ndarray): 256 x 766 x 2 (saturation, intensity),
+                    indexed by [min(R, G, B), R + G + B], same dtype as hue_table
+                dst (np.ndarray): H x W x 3 buffer of the tables' dtype for H,S,I
+                workspace (LUTWorkspace): optional scratch buffers to reuse across calls
+    Returns: np.ndarray: dst
+    """
+    hue_table = np.asarray(hue_table)
+    saturation_intensity_table = np.asarray(saturation_intensity_table)
+    height, width = image.shape[:2]
+    # cv2.remap needs both sides of its output below SHRT_MAX, so larger images go block by block
+    block_shape = (min(height, REMAP_BLOCK), min(width, REMAP_BLOCK))
+    workspace = (workspace or LUTWorkspace()).ensure(block_shape, hue_table.dtype)
+    for top in range(0, height, REMAP_BLOCK):
+        for left in range(0, width, REMAP_BLOCK):
+            rows, columns = slice(top, top + REMAP_BLOCK), slice(left, left + REMAP_BLOCK)
+            _gather_block(image[rows, columns], hue_table, saturation_intensity_table, dst[rows, columns],
+                          workspace)
+    return dst
+
+def rgb_to_hsi_lut(image, out=None, workspace=None):
+    """
+    Parameters: image (np.ndarray): H x W x 3 uint8 BGR image (OpenCV order)
+                out (np.ndarray): optional H x W x 3 float32 buffer for the H,S,I result
+                workspace (LUTWorkspace): optional scratch buffers to reuse across frames
+    Returns: np.ndarray: out, holding hue (degrees), saturation and intensity
+    """
+    if image.dtype != np.uint8:
+        raise TypeError(f"rgb_to_hsi_lut needs a uint8 image, got {image.dtype}")
+
+    out = _output(out, image.shape[:2] + (3,), np.float32)
+    return gather_hsi(image, hue_table(), saturation_intensity_table(), out, workspace)
+
+def hsi_to_rgb_lut(H, S, I, out=None, hue_step=1, levels=64):
+    """
+    Parameters: H (np.ndarray): hue in degrees (wrapped into [0, 360))
+                S, I (np.ndarray): saturation and intensity in [0, 1], same shape as H
+                out (np.ndarray): optional H.shape + (3,) uint8 buffer
+                hue_step, levels: grid resolution (hue spacing in degrees, samples per S/I axis).
+                    levels=64 is off from hsi_to_rgb by at most 9 (mean 1.2) per channel,
+                    levels=256 by at most 4 (mean 0.6) with a 70 MB table.
+    Returns: np.ndarray: out, the image in BGR order
+    """
+    out = _output(out, H.shape + (3,), np.uint8)
+    grid = rgb_grid(hue_step, levels)
+    hue_nodes = grid.shape[0]
+
+    # Nearest grid node along each axis
+    index = np.remainder(H, FULL_TURN, dtype=np.float32)
+    index /= np.float32(hue_step)
+    index = np.rint(index).astype(np.int32)
+    index %= hue_nodes
+    for channel in (S, I):
+        index *= levels
+        index += np.rint(np.clip(channel, 0, 1) * np.float32(levels - 1)).astype(np.int32)
+
+    # reshape copies a non-contiguous out (e.g. a column slice of a wider frame), so gather beside it
+    pixels = out.reshape(-1, 3) if out.flags.c_contiguous else np.empty((index.size, 3), dtype=np.uint8)
+    np.take(grid.reshape(-1, 3), index.reshape(-1), axis=0, out=pixels, mode='clip')
+    if not out.flags.c_contiguous:
+        out[...] = pixels.reshape(out.shape)
+    return out
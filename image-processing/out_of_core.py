@@ -0,0 +1,146 @@
+import argparse
+import importlib.util
+import os
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from tiling import SHARPEN_KERNEL, default_workers, run_tiled, tiled_filter2D, tiled_hsi_to_rgb, tiled_rgb_to_hsi
+
+try:
+    import tifffile
+except ImportError:  # only needed for .tif/.tiff input and output
+    tifffile = None
+
+"""
+Out-of-core processing for images that do not fit in RAM.
+
+Source and destination are memory-mapped (.npy, uncompressed TIFF, or raw
+pixels with a known dtype and shape), and the image is pushed through a
+stage in row tiles with the tiled executor. Only the tiles being worked on
+(one per worker, plus the stage's scratch planes) live in process memory;
+mapped file pages are loaded on demand and can be dropped by the OS at any
+time, so peak memory is set by tile_bytes, not by the image dimensions.
+
+Usage:
+    python3 out_of_core.py --input mosaic.npy --output sharpened.npy --stage sharpen
+    python3 out_of_core.py --input mosaic.raw --dtype uint8 --shape 60000 80000 3 \\
+        --output mosaic_hsi.npy --stage rgb_to_hsi --tile-mb 32
+"""
+
+TIFF_EXTENSIONS = ('.tif', '.tiff')
+DEFAULT_TILE_BYTES = 16 * 1024 * 1024
+# im2uint8 lives with the computer-vision activities
+MATLAB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'computer-vision', 'activity_1', 'matlab.py')
+
+def _require_tifffile(path):
+    if tifffile is None:
+        raise ImportError(f"Reading or writing {path} as a memory-mapped TIFF needs the tifffile package")
+
+def open_image(path, dtype=None, shape=None, offset=0):
+    """Memory-maps an image read-only. Raw files need dtype and shape."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.npy':
+        return np.load(path, mmap_mode='r')
+    if extension in TIFF_EXTENSIONS:
+        _require_tifffile(path)
+        return tifffile.memmap(path, mode='r')  # uncompressed, contiguous TIFFs only
+    if dtype is None or shape is None:
+        raise ValueError(f"{path}: raw input needs dtype and shape")
+    return np.memmap(path, dtype=dtype, mode='r', shape=tuple(shape), offset=offset)
+
+def create_image(path, shape, dtype):
+    """Creates a writable memory-mapped destination of the given shape and dtype."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.npy':
+        return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+    if extension in TIFF_EXTENSIONS:
+        _require_tifffile(path)
+        return tifffile.memmap(path, shape=shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='w+', shape=shape)
+
+@lru_cache(maxsize=None)
+def _load_im2uint8():
+    """
+    im2uint8 from computer-vision/activity_1/matlab.py, loaded on first use.
+    The single loader in this directory; benchmark.py imports it as well.
+    """
+    # Loaded by path under its own name: a top-level "matlab" import would collide with the MATLAB Engine package
+    spec = importlib.util.spec_from_file_location('activity_1_matlab', MATLAB_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.im2uint8
+
+def _im2uint8_stage(src, out, tile_rows, workers):
+    im2uint8 = _load_im2uint8()
+
+    def convert_band(band, dst, top):
+        dst[...] = im2uint8(np.asarray(band))
+
+    return run_tiled(convert_band, src, out, 0, tile_rows, workers)
+
+# stage name -> (output shape, output dtype, run(src, out, tile_rows, workers))
+STAGES = {
+    'sharpen': (
+        lambda shape: shape, lambda dtype: dtype,
+        lambda src, out, rows, workers: tiled_filter2D(src, SHARPEN_KERNEL, out, rows, workers),
+    ),
+    'rgb_to_hsi': (
+        lambda shape: shape[:2] + (3,), lambda dtype: np.float32,
+        lambda src, out, rows, workers: tiled_rgb_to_hsi(src, out, rows, workers),
+    ),
+    'hsi_to_rgb': (
+        lambda shape: shape[:2] + (3,), lambda dtype: np.uint8,
+        lambda src, out, rows, workers: tiled_hsi_to_rgb(src, out, rows, workers),
+    ),
+    'im2uint8': (
+        lambda shape: shape, lambda dtype: np.uint8,
+        _im2uint8_stage,
+    ),
+}
+
+def process_out_of_core(stage, src, out, tile_bytes=DEFAULT_TILE_BYTES, workers=None):
+    """
+    Runs a stage from STAGES over memory-mapped src into memory-mapped out,
+    one tile of about tile_bytes input bytes per worker at a time.
+    """
+    if stage not in STAGES:
+        raise ValueError(f"Unknown stage {stage!r}, expected one of {sorted(STAGES)}")
+
+    workers = workers or default_workers()
+    tile_rows = max(1, tile_bytes // max(1, src.strides[0]))
+    STAGES[stage][2](src, out, tile_rows, workers)
+    out.flush()
+    return out
+
+def process_file(stage, input_path, output_path, dtype=None, shape=None, offset=0,
+                 tile_bytes=DEFAULT_TILE_BYTES, workers=None):
+    src = open_image(input_path, dtype, shape, offset)
+    output_shape, output_dtype, _ = STAGES[stage]
+    out = create_image(output_path, output_shape(src.shape), output_dtype(src.dtype))
+    return process_out_of_core(stage, src, out, tile_bytes, workers)
+
+def main():
+    parser = argparse.ArgumentParser(description="Out-of-core image processing on memory-mapped tiles")
+    parser.add_argument("--input", required=True, help="Source image (.npy, uncompressed .tif/.tiff, or raw)")
+    parser.add_argument("--output", required=True, help="Destination image (.npy, .tif/.tiff, or raw)")
+    parser.add_argument("--stage", required=True, choices=sorted(STAGES), help="Operation to apply")
+    parser.add_argument("--dtype", help="Pixel dtype of a raw input, e.g. uint8 or uint16")
+    parser.add_argument("--shape", type=int, nargs="+", help="Shape of a raw input, e.g. 60000 80000 3")
+    parser.add_argument("--offset", type=int, default=0, help="Header bytes to skip in a raw input")
+    parser.add_argument("--tile-mb", type=float, default=DEFAULT_TILE_BYTES / 2**20, help="Input megabytes per tile")
+    parser.add_argument("--workers", type=int, default=None, help="Worker threads (default: all cores)")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    out = process_file(args.stage, args.input, args.output, args.dtype, args.shape, args.offset,
+                       int(args.tile_mb * 2**20), args.workers)
+    execution_time = time.time() - start_time
+
+    megapixels = out.shape[0] * out.shape[1] / 1e6
+    print(f"{args.stage}: {args.input} -> {args.output} {out.shape} {out.dtype}")
+    print(f"Execution time: {execution_time:.4f} seconds ({megapixels / execution_time:.1f} MP/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from hsi import HSIWorkspace, _output, hsi_to_rgb, rgb_to_hsi
+
+"""
+Tiled, multi-threaded execution for the image-processing kernels.
+
+The image is split into row bands small enough to stay in cache, and each
+band is handed to a worker thread. NumPy ufuncs and OpenCV release the GIL,
+so bands run in parallel on separate cores. Every worker writes straight
+into its rows of the shared output array.
+
+Neighbourhood operations (convolution) need a halo: extra rows above and
+below the band so that pixels on the band edge see the same neighbours as
+in a whole-image call. Bands touching the image edge get no halo on that
+side, so the kernel's own border handling applies there exactly as before.
+"""
+
+# Same kernel as sharpenning.py
+SHARPEN_KERNEL = np.array([[0, -1, 0],
+                           [-1, 5, -1],
+                           [0, -1, 0]])
+
+# Input bytes per band. Kernels keep several float32 planes per input
+# byte, so this leaves the band's working set inside a core's L2 cache.
+CACHE_BYTES = 256 * 1024
+
+def default_workers():
+    return os.cpu_count() or 1
+
+def row_bands(height, band_rows):
+    return [(start, min(start + band_rows, height)) for start in range(0, height, band_rows)]
+
+def default_band_rows(image, workers):
+    rows_in_cache = max(1, CACHE_BYTES // max(1, image.strides[0]))
+    # Keep at least a few bands per worker so uneven bands balance out
+    rows_per_worker = -(-image.shape[0] // (workers * 4))
+    return max(1, min(rows_in_cache, rows_per_worker))
+
+def run_tiled(band_kernel, image, out, halo=0, band_rows=None, workers=None):
+    """
+    Runs band_kernel(src, dst, top) over row bands of image on a thread pool.
+    src:  rows of image for the band plus up to `halo` rows on either side
+    dst:  the band's rows of out (a view, written in place)
+    top:  index of dst's first row inside src
+    Returns out.
+    """
+    workers = workers or default_workers()
+    band_rows = band_rows or default_band_rows(image, workers)
+    height = image.shape[0]
+
+    def run_band(band):
+        start, stop = band
+        src_start = max(0, start - halo)
+        src_stop = min(height, stop + halo)
+        band_kernel(image[src_start:src_stop], out[start:stop], start - src_start)
+
+    bands = row_bands(height, band_rows)
+    if workers == 1:
+        for band in bands:
+            run_band(band)
+        return out
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # list() re-raises the first exception from any band
+        list(pool.map(run_band, bands))
+    return out
+
+def tiled_filter2D(image, kernel=SHARPEN_KERNEL, out=None, band_rows=None, workers=None):
+    """cv2.filter2D(image, -1, kernel) computed band by band."""
+    out = _output(out, image.shape, image.dtype)
+    halo = max(kernel.shape) // 2
+
+    def filter_band(src, dst, top):
+        filtered = cv2.filter2D(src, -1, kernel)
+        dst[...] = filtered[top:top + dst.shape[0]]
+
+    return run_tiled(filter_band, image, out, halo, band_rows, workers)
+
+def tiled_sharpen(image, out=None, band_rows=None, workers=None):
+    return tiled_filter2D(image, SHARPEN_KERNEL, out, band_rows, workers)
+
+def tiled_rgb_to_hsi(image, out=None, band_rows=None, workers=None):
+    out = _output(out, image.shape[:2] + (3,), np.float32)
+    local = threading.local()
+
+    def convert_band(src, dst, top):
+        if not hasattr(local, 'workspace'):
+            local.workspace = HSIWorkspace()
+        rgb_to_hsi(src, out=dst, workspace=local.workspace)
+
+    return run_tiled(convert_band, image, out, 0, band_rows, workers)
+
+def tiled_hsi_to_rgb(hsi, out=None, band_rows=None, workers=None):
+    """hsi is an interleaved H x W x 3 H,S,I image as returned by rgb_to_hsi. Output is BGR uint8."""
+    out = _output(out, hsi.shape[:2] + (3,), np.uint8)
+    local = threading.local()
+
+    def convert_band(src, dst, top):
+        if not hasattr(local, 'workspace'):
+            local.workspace = HSIWorkspace()
+        hsi_to_rgb(src[:, :, 0], src[:, :, 1], src[:, :, 2], out=dst, workspace=local.workspace)
+
+    return run_tiled(convert_band, hsi, out, 0, band_rows, workers)
+
+if __name__ == "__main__":
+    import time
+
+    image = np.random.default_rng(0).integers(0, 256, (4320, 7680, 3), dtype=np.uint8)  # 8K
+
+    for name, operation in (('sharpen', tiled_sharpen), ('rgb_to_hsi', tiled_rgb_to_hsi)):
+        for workers in sorted({1, default_workers()}):
+            start_time = time.time()
+            operation(image, workers=workers)
+            execution_time = time.time() - start_time
+            megapixels = image.shape[0] * image.shape[1] / 1e6
+            print(f"{name} ({workers} workers): {execution_time:.4f} seconds, {megapixels / execution_time:.1f} MP/s")
@@ -0,0 +1,209 @@
+import argparse
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from hsi_adjust import adjust_hsi
+from tiling import SHARPEN_KERNEL, default_workers
+
+"""
+Frame-stream pipeline: decode -> N processing workers -> encode.
+
+    decode thread    cv2.VideoCapture reads each frame into a recycled buffer
+    worker threads   run the image-processing kernel into a recycled output buffer
+    encode thread    puts frames back in order and writes them with cv2.VideoWriter
+
+Bounded queues between the stages give backpressure: a slow encoder stalls
+the workers, which stall the decoder, instead of frames piling up in memory.
+Frame buffers come from fixed pools and go back to them after use, so no
+frame-sized arrays are allocated once the pipeline is running. OpenCV and
+NumPy release the GIL, so the stages overlap on separate cores.
+
+Usage:
+    python3 video.py --input clip.mp4 --output clip_sharpened.avi --operation sharpen --workers 4
+    python3 video.py --input clip.mp4 --output clip_vivid.avi --operation saturation --gain 1.3
+"""
+
+QUEUE_SIZE = 8
+_END = None
+
+class StageMetrics:
+    """Frame count and busy time of one pipeline stage (summed over its threads)."""
+
+    def __init__(self, name):
+        self.name = name
+        self.frames = 0
+        self.busy_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.frames += 1
+            self.busy_seconds += seconds
+
+    def latency(self):
+        return self.busy_seconds / self.frames if self.frames else 0.0
+
+def sharpen_frame(frame, out, state):
+    cv2.filter2D(frame, -1, SHARPEN_KERNEL, dst=out)
+
+def saturation_frame(gain):
+    """Scales HSI saturation by gain (clipped to 1) with the fused band-by-band operator."""
+    def process(frame, out, state):
+        # Frames already run in parallel, so each frame's bands run on its own worker
+        adjust_hsi(frame, saturation_gain=gain, out=out, workers=1)
+
+    return process
+
+class FramePipeline:
+    """
+    Runs process(frame, out, state) over every frame of a video.
+    process writes its result into out; state is a per-worker dict for scratch buffers.
+    """
+
+    def __init__(self, process, workers=None, queue_size=QUEUE_SIZE):
+        self.process = process
+        self.workers = workers or default_workers()
+        self.queue_size = queue_size
+        self.metrics = {name: StageMetrics(name) for name in ('decode', 'process', 'encode')}
+        self.frames = 0
+        self.seconds = 0.0
+        self.error = None
+
+    def fps(self):
+        return self.frames / self.seconds if self.seconds else 0.0
+
+    def run(self, input_path, output_path, fourcc='MJPG'):
+        capture = cv2.VideoCapture(input_path)
+        if not capture.isOpened():
+            raise ValueError(f"Could not open {input_path}")
+
+        width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30
+        writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*fourcc), fps, (width, height))
+        if not writer.isOpened():
+            capture.release()
+            raise ValueError(f"Could not open {output_path} for writing")
+
+        shape = (height, width, 3)
+        # Enough buffers for every queue slot and every busy thread
+        pool_size = self.queue_size + self.workers + 1
+        free_inputs = queue.Queue()
+        free_outputs = queue.Queue()
+        for _ in range(pool_size):
+            free_inputs.put(np.empty(shape, dtype=np.uint8))
+            free_outputs.put(np.empty(shape, dtype=np.uint8))
+
+        decoded = queue.Queue(maxsize=self.queue_size)
+        processed = queue.Queue(maxsize=self.queue_size)
+
+        def decode():
+            index = 0
+            try:
+                while self.error is None:
+                    frame = free_inputs.get()
+                    start_time = time.perf_counter()
+                    ok, frame = capture.read(frame)
+                    if not ok:
+                        break
+                    self.metrics['decode'].record(time.perf_counter() - start_time)
+                    decoded.put((index, frame))
+                    index += 1
+            except Exception as error:
+                self.error = error
+            finally:
+                for _ in range(self.workers):
+                    decoded.put(_END)
+
+        def work():
+            state = {}
+            while True:
+                item = decoded.get()
+                if item is _END:
+                    break
+                index, frame = item
+                if self.error is not None:
+                    # Drain so the decoder is never left blocked
+                    free_inputs.put(frame)
+                    continue
+                out = free_outputs.get()
+                start_time = time.perf_counter()
+                try:
+                    self.process(frame, out, state)
+                except Exception as error:
+                    self.error = error
+                    free_outputs.put(out)
+                    free_inputs.put(frame)
+                    continue
+                self.metrics['process'].record(time.perf_counter() - start_time)
+                free_inputs.put(frame)
+                processed.put((index, out))
+            processed.put(_END)
+
+        def encode():
+            # Workers finish out of order; hold frames until their turn comes
+            pending = {}
+            next_index = 0
+            finished_workers = 0
+            while finished_workers < self.workers:
+                item = processed.get()
+                if item is _END:
+                    finished_workers += 1
+                    continue
+                index, out = item
+                pending[index] = out
+                while next_index in pending:
+                    out = pending.pop(next_index)
+                    start_time = time.perf_counter()
+                    writer.write(out)
+                    self.metrics['encode'].record(time.perf_counter() - start_time)
+                    free_outputs.put(out)
+                    next_index += 1
+                if self.error is not None:
+                    # A lost frame never arrives; give its successors' buffers back
+                    for out in pending.values():
+                        free_outputs.put(out)
+                    pending.clear()
+            self.frames = next_index
+
+        start_time = time.perf_counter()
+        threads = [threading.Thread(target=decode), threading.Thread(target=encode)]
+        threads += [threading.Thread(target=work) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.seconds = time.perf_counter() - start_time
+
+        capture.release()
+        writer.release()
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def report(self):
+        lines = [f"{self.frames} frames in {self.seconds:.4f} seconds ({self.fps():.2f} FPS)"]
+        for metrics in self.metrics.values():
+            lines.append(f"  {metrics.name:<8} {metrics.latency() * 1000:8.2f} ms/frame")
+        return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharpen or adjust a video with overlapped decode/process/encode")
+    parser.add_argument("--input", required=True, help="Input video file")
+    parser.add_argument("--output", required=True, help="Output video file")
+    parser.add_argument("--operation", choices=("sharpen", "saturation"), default="sharpen", help="Per-frame operation")
+    parser.add_argument("--gain", type=float, default=1.3, help="Saturation gain for --operation saturation")
+    parser.add_argument("--workers", type=int, default=None, help="Processing threads (default: all cores)")
+    parser.add_argument("--fourcc", default="MJPG", help="Output codec FourCC")
+    args = parser.parse_args()
+
+    process = sharpen_frame if args.operation == "sharpen" else saturation_frame(args.gain)
+    pipeline = FramePipeline(process, args.workers).run(args.input, args.output, args.fourcc)
+    print(pipeline.report())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import time
+from collections import Counter
+
+"""
+Duplicate-aware sorting.
+
+Datasets like arrayLargeSet hold thousands of values drawn from a handful
+of distinct keys. Counting equal keys in a hash table first costs O(n),
+after which only the d distinct keys are sorted (O(d log d)) instead of
+the whole input. The result can stay in run-length form, a list of
+(value, count) pairs, and ranking/top-k work on the runs directly without
+expanding back to n elements.
+"""
+
+def sortRuns(numbers: list[int], orderBy: str = 'ASC') -> list[tuple[int, int]]:
+    if orderBy not in ('ASC', 'DESC'):
+        raise ValueError(f"orderBy must be 'ASC' or 'DESC', got {orderBy!r}")
+
+    counts = Counter(numbers)
+    return sorted(counts.items(), reverse=orderBy == 'DESC')
+
+def expandRuns(runs: list[tuple[int, int]]) -> list[int]:
+    expanded = []
+    for value, count in runs:
+        expanded.extend([value] * count)
+    return expanded
+
+def duplicateSort(numbers: list[int], orderBy: str = 'ASC', compressed: bool = False) -> list:
+    runs = sortRuns(numbers, orderBy)
+    return runs if compressed else expandRuns(runs)
+
+# Rank of the first occurrence of each value, i.e. the offset of its run.
+def runOffsets(runs: list[tuple[int, int]]) -> dict[int, int]:
+    offsets = {}
+    offset = 0
+    for value, count in runs:
+        offsets[value] = offset
+        offset += count
+    return offsets
+
+# Same ranks the ranking sort assigns: equal values take consecutive ranks
+# in the order they appear in the input.
+def rankFromRuns(numbers: list[int], runs: list[tuple[int, int]]) -> list[int]:
+    nextRank = runOffsets(runs)
+    ranks = [0] * len(numbers)
+    for index, value in enumerate(numbers):
+        ranks[index] = nextRank[value]
+        nextRank[value] += 1
+    return ranks
+
+def topKRuns(runs: list[tuple[int, int]], k: int) -> list[tuple[int, int]]:
+    topRuns = []
+    remaining = k
+    for value, count in runs:
+        if remaining <= 0:
+            break
+        topRuns.append((value, min(count, remaining)))
+        remaining -= count
+    return topRuns
+
+if __name__ == "__main__":
+    from arrayLargeSet import arrayLargeSet
+
+    start_time = time.time()
+
+    runs = duplicateSort(arrayLargeSet, 'ASC', compressed=True)
+    print('Sort: DUPLICATE AWARE')
+    print('Runs: \t\t', runs)
+    print('Top 20: \t', topKRuns(runs, 20))
+    print('Ranks: \t\t', rankFromRuns(arrayLargeSet, runs)[:10])
+
+    end_time = time.time()
+    execution_time = end_time - start_time
+    print(f"Execution time: {execution_time:.4f} seconds")
@@ -0,0 +1,83 @@
+import array
+import operator
+import time
+
+"""
+Key-function and record sorting.
+
+Instead of calling a key per comparison, each key is evaluated once per
+record into a packed column (decorate), the permutation of record indices
+is sorted against that column (sort), and callers reorder whatever they
+need with the permutation (undecorate). Parallel columns can share one
+argsort without copying records.
+
+Multi-key ordering sorts the permutation once per key, least significant
+key first. Python's sort is stable, so earlier passes break ties of later
+ones, and each key can have its own ASC/DESC direction.
+"""
+
+PACKED_TYPECODE = 'q'
+
+def keyGetter(key):
+    # Field index for tuples/lists, attribute name for objects, or any callable
+    if key is None:
+        return None
+    if isinstance(key, int):
+        return operator.itemgetter(key)
+    if isinstance(key, str):
+        return operator.attrgetter(key)
+    return key
+
+def keyColumn(records: list, key=None):
+    getter = keyGetter(key)
+    values = list(records) if getter is None else [getter(record) for record in records]
+
+    # Integer keys are packed into a contiguous array; anything else stays a list
+    try:
+        return array.array(PACKED_TYPECODE, values)
+    except (TypeError, OverflowError):
+        return values
+
+def argsort(records: list, key=None, orderBy: str = 'ASC', keys: list = None) -> list[int]:
+    """
+    Returns the indices that put records in order.
+    key:  a callable, a tuple index or an attribute name (single-key ordering).
+    keys: list of (key, orderBy) pairs, most significant first (multi-key ordering).
+    """
+    if keys is None:
+        keys = [(key, orderBy)]
+
+    permutation = list(range(len(records)))
+    for sortKey, sortOrder in reversed(keys):
+        if sortOrder not in ('ASC', 'DESC'):
+            raise ValueError(f"orderBy must be 'ASC' or 'DESC', got {sortOrder!r}")
+        column = keyColumn(records, sortKey)
+        permutation.sort(key=column.__getitem__, reverse=sortOrder == 'DESC')
+
+    return permutation
+
+def applyPermutation(column, permutation: list[int]) -> list:
+    return [column[index] for index in permutation]
+
+def sortRecords(records: list, key=None, orderBy: str = 'ASC', keys: list = None) -> list:
+    return applyPermutation(records, argsort(records, key, orderBy, keys))
+
+if __name__ == "__main__":
+    from arrayMediumSet import arrayMediumSet
+
+    start_time = time.time()
+
+    # (id, value, bucket) records built from the medium set
+    records = [(index, value, value % 10) for index, value in enumerate(arrayMediumSet)]
+
+    permutation = argsort(records, keys=[(2, 'ASC'), (1, 'DESC')])
+    result = applyPermutation(records, permutation)
+    ids = applyPermutation([record[0] for record in records], permutation)
+
+    print('Sort: KEY (bucket ASC, value DESC)')
+    print('Output: \t', result[:10])
+    print('Ids: \t\t', ids[:10])
+
+    end_time = time.time()
+    execution_time = end_time - start_time
+    print(f"Execution time: {execution_time:.4f} seconds")
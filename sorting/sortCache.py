@@ -0,0 +1,132 @@
+import array
+import hashlib
+import mmap
+import os
+import time
+
+class SortCache:
+    """
+    On-disk cache for sort results (sorted output, rank vector, permutation).
+
+    Entries are keyed by a fingerprint of the packed input buffer and stored
+    as raw native-endian binary files, the same format SortedFileSearch
+    reads. A hit maps the file instead of sorting again. Least recently used
+    entries (by file mtime, bumped on every hit) are evicted once the cache
+    grows past maxBytes.
+    """
+
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+    DEFAULT_TYPECODE = 'q'
+    INDEX_TYPECODE = 'q'
+    DIGEST_SIZE = 16
+    SUFFIX = '.bin'
+
+    def __init__(self, directory: str, maxBytes: int = DEFAULT_MAX_BYTES, typecode: str = DEFAULT_TYPECODE):
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.typecode = typecode
+        os.makedirs(directory, exist_ok=True)
+
+    def pack(self, numbers) -> memoryview:
+        if isinstance(numbers, array.array) and numbers.typecode == self.typecode:
+            return memoryview(numbers)
+        return memoryview(array.array(self.typecode, numbers))
+
+    def fingerprint(self, numbers) -> str:
+        buffer = self.pack(numbers)
+        digest = hashlib.blake2b(buffer, digest_size=self.DIGEST_SIZE)
+        digest.update(f'{self.typecode}:{len(buffer)}'.encode())
+        return digest.hexdigest()
+
+    def sorted(self, numbers, orderBy: str = 'ASC') -> memoryview:
+        return self.lookup(numbers, 'sorted', orderBy, self.typecode,
+            lambda: [numbers[index] for index in self.permutation(numbers, orderBy)])
+
+    # Position each element ends up at in the sorted output (stable for ties).
+    def ranks(self, numbers, orderBy: str = 'ASC') -> memoryview:
+        def computeRanks() -> list[int]:
+            permutation = self.permutation(numbers, orderBy)
+            rankVector = [0] * len(permutation)
+            for rank, index in enumerate(permutation):
+                rankVector[index] = rank
+            return rankVector
+
+        return self.lookup(numbers, 'ranks', orderBy, self.INDEX_TYPECODE, computeRanks)
+
+    # Indices that put the input in order (argsort).
+    def permutation(self, numbers, orderBy: str = 'ASC') -> memoryview:
+        return self.lookup(numbers, 'permutation', orderBy, self.INDEX_TYPECODE,
+            lambda: sorted(range(len(numbers)), key=numbers.__getitem__, reverse=orderBy == 'DESC'))
+
+    def lookup(self, numbers, kind: str, orderBy: str, typecode: str, compute) -> memoryview:
+        if orderBy not in ('ASC', 'DESC'):
+            raise ValueError(f"orderBy must be 'ASC' or 'DESC', got {orderBy!r}")
+
+        path = self.entryPath(self.fingerprint(numbers), kind, orderBy)
+        if os.path.exists(path):
+            os.utime(path)
+            return self.load(path, typecode)
+
+        self.store(path, array.array(typecode, compute()))
+        self.evict(keep=path)
+        return self.load(path, typecode)
+
+    def entryPath(self, fingerprint: str, kind: str, orderBy: str) -> str:
+        return os.path.join(self.directory, f'{fingerprint}.{kind}.{orderBy.lower()}{self.SUFFIX}')
+
+    def load(self, path: str, typecode: str) -> memoryview:
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return memoryview(b'').cast(typecode)
+            # The view keeps the mapping alive after the file is closed
+            return memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)).cast(typecode)
+
+    def store(self, path: str, values: array.array) -> None:
+        # Write beside the target and rename so readers never see a partial file
+        temporaryPath = f'{path}.{os.getpid()}.tmp'
+        with open(temporaryPath, 'wb') as file:
+            values.tofile(file)
+        os.replace(temporaryPath, path)
+
+    def entries(self) -> list[os.DirEntry]:
+        with os.scandir(self.directory) as scanner:
+            return [entry for entry in scanner if entry.name.endswith(self.SUFFIX)]
+
+    def size(self) -> int:
+        return sum(entry.stat().st_size for entry in self.entries())
+
+    def evict(self, keep: str = None) -> None:
+        entries = sorted(self.entries(), key=lambda entry: entry.stat().st_mtime)
+        totalBytes = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if totalBytes <= self.maxBytes:
+                break
+            if entry.path == keep:
+                continue
+            totalBytes -= entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass  # evicted by another process
+
+    def clear(self) -> None:
+        for entry in self.entries():
+            os.remove(entry.path)
+
+if __name__ == "__main__":
+    import tempfile
+    from arrayMediumSet import arrayMediumSet
+
+    cache = SortCache(os.path.join(tempfile.gettempdir(), 'sort-cache'))
+
+    for attempt in ('Miss', 'Hit'):
+        start_time = time.time()
+        result = cache.sorted(arrayMediumSet, 'ASC')
+        ranks = cache.ranks(arrayMediumSet, 'ASC')
+        end_time = time.time()
+        print(f'Sort Cache ({attempt})')
+        print('Output: \t', result[:10].tolist())
+        print('Ranks: \t\t', ranks[:10].tolist())
+        print(f"Execution time: {end_time - start_time:.4f} seconds")
+
+    cache.clear()
@@ -0,0 +1,131 @@
+import array
+import bisect
+import mmap
+import os
+import time
+
+class SortedFileSearch:
+    """
+    Lower/upper bound queries over a sorted fixed-width binary file without
+    loading it into a Python list. The file is memory-mapped and searched
+    in place, so only the pages touched by the search are read from disk.
+
+    File format: raw native-endian integers, one fixed-width item after the
+    other (exactly what array.array(typecode).tofile() writes).
+    """
+
+    DEFAULT_TYPECODE = 'q'  # signed 64-bit
+    PAGE_SIZE = mmap.PAGESIZE
+    NO_FENCES = 0
+
+    def __init__(self, path: str, typecode: str = DEFAULT_TYPECODE, fenceStride: int = None):
+        self.path = path
+        self.typecode = typecode
+        self.itemSize = array.array(typecode).itemsize
+
+        fileSize = os.path.getsize(path)
+        if fileSize % self.itemSize != 0:
+            raise ValueError(f"{path}: size {fileSize} is not a multiple of item size {self.itemSize}")
+
+        self.file = open(path, 'rb')
+        if fileSize == 0:
+            # mmap refuses zero-length files
+            self.mapped = None
+            self.items = memoryview(b'').cast(typecode)
+        else:
+            self.mapped = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.items = memoryview(self.mapped).cast(typecode)
+
+        self.itemCount = len(self.items)
+
+        # One fence per page by default: the fence list narrows every query
+        # down to a single page before the mapped file is touched.
+        if fenceStride is None:
+            fenceStride = max(1, self.PAGE_SIZE // self.itemSize)
+        self.fenceStride = fenceStride
+        self.fences = self.buildFences() if fenceStride != self.NO_FENCES else None
+
+    def buildFences(self) -> list[int]:
+        return [self.items[index] for index in range(0, self.itemCount, self.fenceStride)]
+
+    def narrow(self, fenceIndex: int) -> tuple[int, int]:
+        # Answer lies after the fence before fenceIndex and at or before fenceIndex
+        start = max(0, (fenceIndex - 1) * self.fenceStride)
+        end = min(self.itemCount, fenceIndex * self.fenceStride)
+        return start, end
+
+    # First index whose value is >= val (itemCount if none).
+    def lowerBound(self, val: int, start: int = 0) -> int:
+        end = self.itemCount
+        if self.fences is not None:
+            fenceStart, end = self.narrow(bisect.bisect_left(self.fences, val))
+            start = max(start, fenceStart)
+        return bisect.bisect_left(self.items, val, start, max(start, end))
+
+    # First index whose value is > val (itemCount if none).
+    def upperBound(self, val: int, start: int = 0) -> int:
+        end = self.itemCount
+        if self.fences is not None:
+            fenceStart, end = self.narrow(bisect.bisect_right(self.fences, val))
+            start = max(start, fenceStart)
+        return bisect.bisect_right(self.items, val, start, max(start, end))
+
+    def count(self, val: int) -> int:
+        return self.upperBound(val) - self.lowerBound(val)
+
+    # Answers many queries at once. Queries are visited in sorted order so the
+    # mapped pages are read front to back, and each answer is used as the
+    # starting point of the next search. Results keep the caller's order.
+    def batchLowerBound(self, values: list[int]) -> list[int]:
+        return self.batch(values, self.lowerBound)
+
+    def batchUpperBound(self, values: list[int]) -> list[int]:
+        return self.batch(values, self.upperBound)
+
+    def batch(self, values: list[int], search) -> list[int]:
+        results = [0] * len(values)
+        previous = 0
+        for position in sorted(range(len(values)), key=values.__getitem__):
+            previous = search(values[position], previous)
+            results[position] = previous
+        return results
+
+    def close(self) -> None:
+        self.items.release()
+        if self.mapped is not None:
+            self.mapped.close()
+        self.file.close()
+
+    def __len__(self) -> int:
+        return self.itemCount
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def writeSortedFile(path: str, numbers: list[int], typecode: str = SortedFileSearch.DEFAULT_TYPECODE) -> None:
+    with open(path, 'wb') as file:
+        array.array(typecode, sorted(numbers)).tofile(file)
+
+if __name__ == "__main__":
+    import tempfile
+    from arrayMediumSet import arrayMediumSet
+
+    start_time = time.time()
+
+    path = os.path.join(tempfile.gettempdir(), 'arrayMediumSet.bin')
+    writeSortedFile(path, arrayMediumSet)
+
+    with SortedFileSearch(path) as search:
+        print('Sorted File Search')
+        print('Lower bound of 5000: \t', search.lowerBound(5000))
+        print('Upper bound of 5000: \t', search.upperBound(5000))
+        print('Batch lower bounds: \t', search.batchLowerBound([9000, 1000, 5000]))
+
+    os.remove(path)
+
+    end_time = time.time()
+    execution_time = end_time - start_time
+    print(f"Execution time: {execution_time:.4f} seconds")